@@ -0,0 +1,113 @@
+"""Compare Python overhead of ``UserPostgres`` statements per call.
+
+Compares statements built inline on every call, as the repository did
+before, with the module-level statements of ``repositories.sql_db.user_db``
+taking values as bound parameters. Each call builds (or reuses) a statement,
+looks it up in the SQLAlchemy compiled cache the way ``Connection.execute``
+does and binds parameters, nothing is sent to a database.
+
+Run from the repository root:
+    PYTHONPATH=users_app python benchmarks/repository_queries.py
+"""
+
+import os
+import timeit
+from collections.abc import Callable
+from typing import Any
+
+
+for name in ('db_url', 'secret_key', 'redis_url', 'amqp_url', 'storage_path',
+             's3_key', 's3_secret', 's3_region_name'):
+    os.environ.setdefault(name, 'benchmark')
+
+from sqlalchemy import select, update  # noqa: E402
+from sqlalchemy.dialects import postgresql  # noqa: E402
+from sqlalchemy.sql.base import Executable  # noqa: E402
+from sqlalchemy.util import LRUCache  # noqa: E402
+
+from repositories.sql_db.models import Profile, User  # noqa: E402
+from repositories.sql_db.user_db import (  # noqa: E402
+    GET_CREDENTIALS_BY_EMAIL,
+    GET_USER_INFO_BY_ID,
+    UPDATE_PROFILE,
+    USER_INFO_COLUMNS,
+)
+
+
+NUMBER = 20_000
+EMAIL = 'firstname.lastname@example.com'
+USER_ID = 1234567
+
+dialect = postgresql.asyncpg.dialect()
+
+
+def inline_login() -> tuple[Executable, dict[str, Any]]:
+    stmt = select(User.user_id, User.email, User.password, User.is_active).where(
+        User.email == EMAIL
+    )
+    return stmt, {}
+
+
+def inline_me() -> tuple[Executable, dict[str, Any]]:
+    stmt = (
+        select(*USER_INFO_COLUMNS)
+        .join_from(User, Profile)
+        .where(User.user_id == USER_ID)
+    )
+    return stmt, {}
+
+
+def inline_profile_update() -> tuple[Executable, dict[str, Any]]:
+    stmt = (
+        update(Profile)
+        .where(Profile.user_id == USER_ID)
+        .values(first_name='Firstname', last_name='Lastname')
+        .returning(Profile)
+    )
+    return stmt, {}
+
+
+def prebuilt_login() -> tuple[Executable, dict[str, Any]]:
+    return GET_CREDENTIALS_BY_EMAIL, {'email': EMAIL}
+
+
+def prebuilt_me() -> tuple[Executable, dict[str, Any]]:
+    return GET_USER_INFO_BY_ID, {'user_id': USER_ID}
+
+
+def prebuilt_profile_update() -> tuple[Executable, dict[str, Any]]:
+    return UPDATE_PROFILE, {
+        'target_user_id': USER_ID,
+        'new_first_name': 'Firstname',
+        'new_last_name': 'Lastname',
+    }
+
+
+def per_call(build: Callable[[], tuple[Executable, dict[str, Any]]]) -> float:
+    """Microseconds per statement build, compiled cache lookup and binding."""
+    cache = LRUCache(500)
+
+    def execute() -> None:
+        stmt, params = build()
+        # Same lookup as ``Connection._execute_clauseelement``.
+        compiled, extracted, _ = stmt._compile_w_cache(  # type: ignore[attr-defined]
+            dialect, compiled_cache=cache, column_keys=sorted(params)
+        )
+        compiled.construct_params(params, extracted_parameters=extracted)
+
+    execute()
+    return timeit.timeit(execute, number=NUMBER) / NUMBER * 1e6
+
+
+def main() -> None:
+    print(f'{"query":<16}{"inline, us":>12}{"prebuilt, us":>14}')
+    for query, inline, prebuilt in (
+        ('login', inline_login, prebuilt_login),
+        ('/me', inline_me, prebuilt_me),
+        ('profile update', inline_profile_update, prebuilt_profile_update),
+    ):
+        print(f'{query:<16}{per_call(inline):>12.1f}{per_call(prebuilt):>14.1f}')
+
+
+if __name__ == '__main__':
+    main()
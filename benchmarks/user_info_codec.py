@@ -0,0 +1,87 @@
+"""Compare cached ``UserInfoSchema`` formats.
+
+Compares the pydantic JSON string with field names, which was cached before,
+with the Redis hash fields of ``UserInfoHashCodec`` for every value codec.
+Sizes are reported by ``MEMORY USAGE`` of keys written to the Redis at
+``BENCHMARK_REDIS_URL``, so they include the key and hash overhead.
+
+Run from the repository root:
+    BENCHMARK_REDIS_URL=redis://localhost:6379/15 \
+        PYTHONPATH=users_app python benchmarks/user_info_codec.py
+"""
+
+import os
+import timeit
+
+from redis import Redis
+
+
+for name in ('db_url', 'secret_key', 'redis_url', 'amqp_url', 'storage_path',
+             's3_key', 's3_secret', 's3_region_name'):
+    os.environ.setdefault(name, 'benchmark')
+
+from domain.schemas.user_schemas import (  # noqa: E402
+    ProfileInfoSchema,
+    UserInfoSchema,
+)
+from repositories.cache.base_cache import CacheEntry  # noqa: E402
+from repositories.cache.codecs import (  # noqa: E402
+    IUserInfoCodec,
+    JsonUserInfoCodec,
+    PlainUserInfoCodec,
+    UserInfoHashCodec,
+)
+
+
+NUMBER = 20_000
+KEY = 'benchmark:user_info'
+
+
+def memory_usage(redis: Redis) -> int:
+    try:
+        return int(redis.memory_usage(KEY, samples=0) or 0)
+    finally:
+        redis.delete(KEY)
+
+
+def main() -> None:
+    redis = Redis.from_url(os.environ.get('BENCHMARK_REDIS_URL', 'redis://localhost:6379/15'))
+    schema = UserInfoSchema(
+        user_id=1234567,
+        email='firstname.lastname@example.com',
+        profile=ProfileInfoSchema(
+            first_name='Firstname',
+            last_name='Lastname',
+            avatar='4b0e1c8a3f0a2b9d6c5e7f1a2b3c4d5e6f708192.jpeg',
+        ),
+    )
+    print(f'{"format":<12}{"bytes":>8}{"encode, us":>14}{"decode, us":>14}')
+
+    legacy = schema.model_dump_json().encode()
+    redis.set(KEY, legacy)
+    size = memory_usage(redis)
+    encode = timeit.timeit(schema.model_dump_json, number=NUMBER)
+    decode = timeit.timeit(lambda: UserInfoSchema.model_validate_json(legacy), number=NUMBER)
+    print(f'{"json":<12}{size:>8}{encode / NUMBER * 1e6:>14.2f}'
+          f'{decode / NUMBER * 1e6:>14.2f}')
+
+    entry = CacheEntry(schema, expires_at=1_700_000_000.0, delta=0.002)
+    values: IUserInfoCodec
+    for label, values in (('hash plain', PlainUserInfoCodec()),
+                          ('hash json', JsonUserInfoCodec())):
+        codec = UserInfoHashCodec(values)
+        redis.hset(KEY, mapping={'ver': '0', **codec.encode(entry)})
+        # values as returned by HMGET
+        fields = redis.hmget(KEY, codec.fields)
+        size = memory_usage(redis)
+        assert codec.decode(fields) == entry._replace(version=0)
+        encode = timeit.timeit(lambda c=codec: c.encode(entry), number=NUMBER)
+        decode = timeit.timeit(
+            lambda c=codec, f=fields: c.decode(f), number=NUMBER
+        )
+        print(f'{label:<12}{size:>8}{encode / NUMBER * 1e6:>14.2f}'
+              f'{decode / NUMBER * 1e6:>14.2f}')
+
+
+if __name__ == '__main__':
+    main()
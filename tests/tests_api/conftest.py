@@ -12,9 +12,11 @@ from adapters.broker.mock.mock_notify import MockNotifyService
 from adapters.broker.notify_base import INotifyService
 from api.v1.routers import get_routers_v1
 from core.dependency import impl
-from core.exception_handler import ExceptionHandlerMiddleware
+from core.exception_handler import add_exception_handlers
+from core.timing import ServerTimingMiddleware
 from domain.services.user_service import HashService
 from repositories.cache.base_cache import IUserBaseCache, IUserCodeCache
+from repositories.cache.redis_connect import RedisCache
 from repositories.cache.user_redis import UserCodeRedisCache, UserRedisCache
 from repositories.repository import IUserRepository
 from repositories.sql_db.models import User
@@ -38,7 +40,8 @@ def build_test_app() -> FastAPI:
     impl.register_all(injections)
     app = FastAPI()
     app.include_router(get_routers_v1())
-    app.add_middleware(ExceptionHandlerMiddleware)
+    add_exception_handlers(app)
+    app.add_middleware(ServerTimingMiddleware)
     return app
 
 
@@ -51,6 +54,22 @@ def tables():
     downgrade(alembic, "base")
 
 
+@pytest.fixture(scope="function", autouse=True)
+async def database() -> AsyncGenerator[None, Any]:
+    """Shared engine for app and fixtures, disposed with the test event loop."""
+    Database.connect()
+    yield
+    await Database.disconnect()
+
+
+@pytest.fixture(scope="function", autouse=True)
+async def redis() -> AsyncGenerator[None, Any]:
+    """Shared Redis client closed with the test event loop, the next test opens a new one."""
+    yield
+    await RedisCache.connect().aclose(close_connection_pool=True)
+    RedisCache.connect.cache_clear()
+
+
 @pytest.fixture(scope="function")
 async def active_user():
     """User fixture with is_active=True."""
@@ -0,0 +1,547 @@
+import hashlib
+import io
+import re
+from collections.abc import AsyncIterable, AsyncIterator, Iterator
+from pathlib import Path
+from typing import ClassVar
+
+import pytest
+from httpx import AsyncClient
+from PIL import Image
+
+from core.dependency import impl
+from domain.constants.avatar_constants import (
+    AVATAR_BUCKET,
+    AVATAR_CACHE_CONTROL,
+    AVATAR_CHUNK_SIZE,
+    AVATAR_DEFAULT_SIZE,
+    AVATAR_MAX_BODY_SIZE,
+    AVATAR_MAX_PIXELS,
+    AVATAR_MAX_SIZE,
+    AVATAR_SIZES,
+    AVATAR_UPLOAD_KEY_PATTERN,
+    AvatarVariantTypes,
+)
+from domain.custom_types.types_users import UIDType
+from domain.exceptions.avatar_exceptions import AvatarTooLargeError
+from domain.services.auth_service import JWTService
+from domain.services.avatar_service import AvatarGetService, UserAvatarSetService
+from repositories.sql_db.unit_of_work import request_unit_of_work
+from repositories.storage.base import IStorage, PresignedUpload
+from repositories.storage.local import LocalStorage
+
+
+def image_bytes(image_format: str = 'PNG', size: tuple[int, int] = (300, 200)) -> bytes:
+    buffer = io.BytesIO()
+    Image.new('RGB', size, 'red').save(buffer, image_format)
+    return buffer.getvalue()
+
+
+class RecordingStorage(LocalStorage):
+    """Local storage recording uploaded keys."""
+
+    uploads: ClassVar[list[str]] = []
+
+    async def upload_avatar(
+        self, body: bytes | AsyncIterable[bytes], obj_name: str, content_type: str
+    ) -> None:
+        self.uploads.append(obj_name)
+        await super().upload_avatar(body, obj_name, content_type)
+
+
+class StaleStorage(RecordingStorage):
+    """Reports missing avatars as stored, like a check before a concurrent release."""
+
+    stale_checks = 0
+
+    async def avatar_exists(self, obj_name: str) -> bool:
+        if StaleStorage.stale_checks > 0:
+            StaleStorage.stale_checks -= 1
+            return True
+        return await super().avatar_exists(obj_name)
+
+
+class DirectUploadStorage(LocalStorage):
+    """Local storage presigning uploads, the tests put the files in place."""
+
+    async def create_avatar_upload(
+        self, obj_name: str, content_type: str, max_size: int, expires_in: int
+    ) -> PresignedUpload:
+        return PresignedUpload(
+            url='http://storage/avatars',
+            fields={'key': obj_name, 'Content-Type': content_type},
+        )
+
+
+
+@pytest.fixture(scope="function")
+def direct_storage(client: AsyncClient) -> Iterator[type[DirectUploadStorage]]:
+    impl.container.register(IStorage, DirectUploadStorage)
+    yield DirectUploadStorage
+    impl.container.register(IStorage, LocalStorage)
+
+
+@pytest.fixture(scope="function")
+def recording_storage(client: AsyncClient) -> Iterator[type[RecordingStorage]]:
+    RecordingStorage.uploads = []
+    impl.container.register(IStorage, RecordingStorage)
+    yield RecordingStorage
+    impl.container.register(IStorage, LocalStorage)
+
+
+@pytest.fixture(scope="function", autouse=True)
+def storage(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    """Local storage writes avatars relative to the working directory."""
+    monkeypatch.chdir(tmp_path)
+    return tmp_path / AVATAR_BUCKET
+
+
+def variant_keys(data: bytes) -> set[str]:
+    base = hashlib.sha256(data).hexdigest()
+    return {
+        f'{base}_{size}.{mime_type.name}'
+        for size in AVATAR_SIZES
+        for mime_type in AvatarVariantTypes
+    }
+
+
+def stored_keys(storage: Path) -> set[str]:
+    """Keys of avatars in the local storage, direct uploads are not counted."""
+    if not storage.exists():
+        return set()
+    return {path.name for path in storage.iterdir() if path.is_file()}
+
+
+def is_stored(storage: Path, key: str) -> bool:
+    return (storage / key).exists()
+
+
+def store_file(storage: Path, key: str, data: bytes) -> None:
+    """Put file into the local storage bypassing the service."""
+    path = storage / key
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(data)
+
+
+async def sign_up(client: AsyncClient, email: str) -> dict[str, str]:
+    """Sign up user and return its authorization headers."""
+    response = await client.post(
+        '/users/signup',
+        json={
+            'email': email,
+            'password': 'password123PASS@',
+            're_password': 'password123PASS@',
+        }
+    )
+    token = JWTService.create_tokens(response.json()['user_id']).access_token
+    return {'Authorization': f'Bearer {token}'}
+
+
+@pytest.mark.asyncio
+class TestAvatarUpload:
+    url = '/avatars'
+
+    async def test_upload_avatar(self, client: AsyncClient, storage: Path) -> None:
+        headers = await sign_up(client, 'avatar_upload@gmail.com')
+        response = await client.post(
+            self.url,
+            files={'file': ('avatar.png', image_bytes(), 'image/png')},
+            headers=headers,
+        )
+        assert response.status_code == 200, ('Failed avatar upload')
+        assert response.json() == {'success': True}
+        response = await client.get('/users/me', headers=headers)
+        profile = response.json()['profile']
+        assert profile['avatar'] is not None
+        assert profile['avatar_srcset'] is not None
+        assert stored_keys(storage)
+
+    async def test_upload_without_token(self, client: AsyncClient) -> None:
+        response = await client.post(
+            self.url, files={'file': ('avatar.png', image_bytes(), 'image/png')}
+        )
+        assert response.status_code == 403
+
+    async def test_upload_too_large(self, client: AsyncClient, storage: Path) -> None:
+        headers = await sign_up(client, 'avatar_large@gmail.com')
+        data = image_bytes()
+        data += bytes(AVATAR_MAX_SIZE + 1 - len(data))
+        response = await client.post(
+            self.url,
+            files={'file': ('avatar.png', data, 'image/png')},
+            headers=headers,
+        )
+        assert response.status_code == 413
+        assert not stored_keys(storage), ('Rejected avatar was stored')
+
+    async def test_upload_not_allowed_type(self, client: AsyncClient) -> None:
+        headers = await sign_up(client, 'avatar_gif@gmail.com')
+        response = await client.post(
+            self.url,
+            files={'file': ('avatar.png', image_bytes('GIF'), 'image/png')},
+            headers=headers,
+        )
+        assert response.status_code == 415, ('Type was taken from the client')
+
+    async def test_type_sniffed_from_content(self, client: AsyncClient) -> None:
+        headers = await sign_up(client, 'avatar_sniff@gmail.com')
+        response = await client.post(
+            self.url,
+            files={'file': ('avatar.gif', image_bytes('JPEG'), 'image/gif')},
+            headers=headers,
+        )
+        assert response.status_code == 200, ('Type was taken from the client')
+
+    async def test_declared_length_over_limit(self, client: AsyncClient) -> None:
+        read = False
+
+        async def body() -> AsyncIterator[bytes]:
+            nonlocal read
+            read = True
+            yield b''
+
+        headers = {
+            'Content-Length': str(AVATAR_MAX_BODY_SIZE + 1),
+            'Content-Type': 'multipart/form-data; boundary=avatar',
+        }
+        response = await client.post(
+            self.url,
+            content=body(),
+            headers=headers | await sign_up(client, 'avatar_declared@gmail.com'),
+        )
+        assert response.status_code == 413
+        assert not read, ('Body was read before the declared length was checked')
+
+        response = await client.post(self.url, content=body(), headers=headers)
+        assert response.status_code == 403
+        assert not read, ('Body was read before the token was checked')
+
+    async def test_stream_over_limit(self, client: AsyncClient, storage: Path) -> None:
+        async def chunks() -> AsyncIterator[bytes]:
+            yield image_bytes()
+            while True:
+                yield bytes(AVATAR_CHUNK_SIZE)
+
+        with pytest.raises(AvatarTooLargeError):
+            await UserAvatarSetService().set(UIDType(1), chunks())
+        assert not stored_keys(storage), ('Rejected avatar was stored')
+
+
+@pytest.mark.asyncio
+class TestAvatarVariants:
+    url = '/avatars'
+
+    async def upload(self, client: AsyncClient, email: str, data: bytes) -> int:
+        headers = await sign_up(client, email)
+        response = await client.post(
+            self.url,
+            files={'file': ('avatar', data, 'application/octet-stream')},
+            headers=headers,
+        )
+        return response.status_code
+
+    async def test_variants_of_every_size(self, client: AsyncClient, storage: Path) -> None:
+        data = image_bytes(size=(300, 200))
+        assert await self.upload(client, 'avatar_variants@gmail.com', data) == 200
+        base = hashlib.sha256(data).hexdigest()
+        assert stored_keys(storage) == variant_keys(data)
+        for size in AVATAR_SIZES:
+            with Image.open(storage / f'{base}_{size}.jpeg') as image:
+                assert image.size == (size, size)
+
+    async def test_metadata_removed(self, client: AsyncClient, storage: Path) -> None:
+        exif = Image.Exif()
+        exif[0x010e] = 'private description'
+        buffer = io.BytesIO()
+        Image.new('RGB', (100, 100), 'blue').save(buffer, 'JPEG', exif=exif)
+        data = buffer.getvalue()
+        assert await self.upload(client, 'avatar_exif@gmail.com', data) == 200
+        base = hashlib.sha256(data).hexdigest()
+        with Image.open(storage / f'{base}_{max(AVATAR_SIZES)}.jpeg') as image:
+            assert 'exif' not in image.info, ('Variant kept EXIF metadata')
+
+    async def test_decompression_bomb(self, client: AsyncClient, storage: Path) -> None:
+        side = int(AVATAR_MAX_PIXELS ** 0.5) + 1
+        buffer = io.BytesIO()
+        Image.new('1', (side, side)).save(buffer, 'PNG')
+        data = buffer.getvalue()
+        assert len(data) < AVATAR_MAX_SIZE
+        assert await self.upload(client, 'avatar_bomb@gmail.com', data) == 400
+        assert not stored_keys(storage), ('Rejected avatar was stored')
+
+    async def test_corrupted_image(self, client: AsyncClient, storage: Path) -> None:
+        data = image_bytes()[:64]
+        assert await self.upload(client, 'avatar_corrupted@gmail.com', data) == 400
+        assert not stored_keys(storage), ('Rejected avatar was stored')
+
+
+@pytest.mark.asyncio
+class TestAvatarRelease:
+    url = '/avatars'
+
+    async def upload(self, client: AsyncClient, headers: dict[str, str], data: bytes) -> None:
+        response = await client.post(
+            self.url,
+            files={'file': ('avatar.png', data, 'image/png')},
+            headers=headers,
+        )
+        assert response.status_code == 200, ('Failed avatar upload')
+
+    async def test_same_content_stored_once(
+        self,
+        client: AsyncClient,
+        recording_storage: type[RecordingStorage],
+    ) -> None:
+        data = image_bytes(size=(120, 80))
+        await self.upload(client, await sign_up(client, 'dedup_first@gmail.com'), data)
+        await self.upload(client, await sign_up(client, 'dedup_second@gmail.com'), data)
+        assert sorted(recording_storage.uploads) == sorted(variant_keys(data)), (
+            'Same content was processed again'
+        )
+
+    async def test_replaced_avatar_released(
+        self, client: AsyncClient, storage: Path
+    ) -> None:
+        headers = await sign_up(client, 'release_replaced@gmail.com')
+        first, second = image_bytes(size=(100, 90)), image_bytes(size=(90, 100))
+        await self.upload(client, headers, first)
+        await self.upload(client, headers, second)
+        assert stored_keys(storage) == variant_keys(second)
+
+    async def test_referenced_avatar_kept(self, client: AsyncClient, storage: Path) -> None:
+        first, second = image_bytes(size=(110, 90)), image_bytes(size=(90, 110))
+        owner = await sign_up(client, 'release_owner@gmail.com')
+        other = await sign_up(client, 'release_other@gmail.com')
+        await self.upload(client, owner, first)
+        await self.upload(client, other, first)
+        await self.upload(client, owner, second)
+        assert stored_keys(storage) == variant_keys(first) | variant_keys(second), (
+            'Avatar of another user was released'
+        )
+
+    async def test_reupload_kept(self, client: AsyncClient, storage: Path) -> None:
+        headers = await sign_up(client, 'release_reupload@gmail.com')
+        data = image_bytes(size=(130, 90))
+        await self.upload(client, headers, data)
+        await self.upload(client, headers, data)
+        assert stored_keys(storage) == variant_keys(data)
+
+    async def test_released_after_commit_only(
+        self, client: AsyncClient, storage: Path
+    ) -> None:
+        headers = await sign_up(client, 'release_rollback@gmail.com')
+        first = image_bytes(size=(140, 90))
+        await self.upload(client, headers, first)
+        user_id = (await client.get('/users/me', headers=headers)).json()['user_id']
+
+        async def chunks() -> AsyncIterator[bytes]:
+            yield image_bytes(size=(90, 140))
+
+        unit_of_work = request_unit_of_work()
+        await anext(unit_of_work)
+        await UserAvatarSetService().set(UIDType(user_id), chunks())
+        with pytest.raises(RuntimeError):
+            await unit_of_work.athrow(RuntimeError)
+        assert variant_keys(first) <= stored_keys(storage), (
+            'Avatar was released before commit'
+        )
+        response = await client.get('/users/me', headers=headers)
+        assert hashlib.sha256(first).hexdigest() in response.json()['profile']['avatar']
+
+    async def test_variants_restored_under_lock(
+        self,
+        client: AsyncClient,
+        storage: Path,
+        recording_storage: type[RecordingStorage],
+    ) -> None:
+        impl.container.register(IStorage, StaleStorage)
+        StaleStorage.stale_checks = len(AVATAR_SIZES) * len(AvatarVariantTypes)
+        data = image_bytes(size=(150, 90))
+        await self.upload(client, await sign_up(client, 'release_race@gmail.com'), data)
+        assert stored_keys(storage) == variant_keys(data), (
+            'Variants released before the lock were not uploaded again'
+        )
+
+
+class TestAvatarCaching:
+    def test_immutable_keys(self) -> None:
+        base = 'a' * 64
+        assert AvatarGetService.is_immutable(f'{base}_256.jpeg')
+        assert not AvatarGetService.is_immutable(f'uploads/1/{"b" * 32}.png')
+        assert not AvatarGetService.is_immutable(f'{"c" * 40}_256.jpeg'), (
+            'Legacy key overwritten in place was cached as immutable'
+        )
+
+
+@pytest.mark.asyncio
+class TestAvatarGet:
+    url = '/avatars'
+
+    async def stored_key(self, client: AsyncClient, email: str) -> tuple[str, bytes]:
+        """Upload avatar and return the key and content of its default variant."""
+        data = image_bytes(size=(160, 90))
+        response = await client.post(
+            self.url,
+            files={'file': ('avatar.png', data, 'image/png')},
+            headers=await sign_up(client, email),
+        )
+        assert response.status_code == 200, ('Failed avatar upload')
+        key = f'{hashlib.sha256(data).hexdigest()}_{AVATAR_DEFAULT_SIZE}.jpeg'
+        return key, (Path(AVATAR_BUCKET) / key).read_bytes()
+
+    async def test_get_immutable_avatar(self, client: AsyncClient) -> None:
+        key, content = await self.stored_key(client, 'get_avatar@gmail.com')
+        response = await client.get(f'{self.url}/{key}')
+        assert response.status_code == 200
+        assert response.content == content
+        assert response.headers['cache-control'] == AVATAR_CACHE_CONTROL
+        assert response.headers['etag'] == f'"{key}"'
+        assert response.headers['accept-ranges'] == 'bytes'
+
+    async def test_get_range(self, client: AsyncClient) -> None:
+        key, content = await self.stored_key(client, 'get_range@gmail.com')
+        response = await client.get(f'{self.url}/{key}', headers={'Range': 'bytes=10-19'})
+        assert response.status_code == 206
+        assert response.content == content[10:20]
+        assert response.headers['content-range'] == f'bytes 10-19/{len(content)}'
+
+        response = await client.get(f'{self.url}/{key}', headers={'Range': 'bytes=-5'})
+        assert response.status_code == 206
+        assert response.content == content[-5:]
+
+    async def test_range_not_satisfiable(self, client: AsyncClient) -> None:
+        key, content = await self.stored_key(client, 'get_range_416@gmail.com')
+        response = await client.get(
+            f'{self.url}/{key}', headers={'Range': f'bytes={len(content)}-'}
+        )
+        assert response.status_code == 416
+        assert response.headers['content-range'] == f'bytes */{len(content)}'
+
+    async def test_if_range_mismatch_sends_whole_file(self, client: AsyncClient) -> None:
+        key, content = await self.stored_key(client, 'get_if_range@gmail.com')
+        response = await client.get(
+            f'{self.url}/{key}', headers={'Range': 'bytes=0-9', 'If-Range': '"other"'}
+        )
+        assert response.status_code == 200, ('Range of another version was sent')
+        assert response.content == content
+
+    async def test_not_modified(self, client: AsyncClient) -> None:
+        key, _ = await self.stored_key(client, 'get_not_modified@gmail.com')
+        response = await client.get(f'{self.url}/{key}', headers={'If-None-Match': f'"{key}"'})
+        assert response.status_code == 304
+        assert response.content == b''
+        assert response.headers['etag'] == f'"{key}"'
+
+    async def test_head(self, client: AsyncClient) -> None:
+        key, content = await self.stored_key(client, 'head_avatar@gmail.com')
+        response = await client.head(f'{self.url}/{key}')
+        assert response.status_code == 200
+        assert response.content == b''
+        assert response.headers['content-length'] == str(len(content))
+
+    async def test_legacy_avatar_revalidated(
+        self, client: AsyncClient, storage: Path
+    ) -> None:
+        key = f'{"d" * 40}_{AVATAR_DEFAULT_SIZE}.jpeg'
+        store_file(storage, key, image_bytes('JPEG'))
+        response = await client.get(f'{self.url}/{key}')
+        assert response.status_code == 200
+        assert response.headers['cache-control'] == 'no-cache'
+        assert response.headers['etag'] != f'"{key}"', (
+            'Legacy key was validated by the key only'
+        )
+
+    async def test_missing_avatar(self, client: AsyncClient) -> None:
+        response = await client.get(f'{self.url}/{"e" * 64}_256.jpeg')
+        assert response.status_code == 404
+
+
+@pytest.mark.asyncio
+class TestAvatarDirectUpload:
+    upload_url = '/avatars/upload-url'
+    confirm_url = '/avatars/confirm'
+
+    async def create_upload(
+        self, client: AsyncClient, headers: dict[str, str], content_type: str
+    ) -> str:
+        response = await client.post(
+            self.upload_url, json={'content_type': content_type}, headers=headers
+        )
+        assert response.status_code == 200, ('Failed to presign upload')
+        return response.json()['key']
+
+    async def test_local_storage_not_supported(self, client: AsyncClient) -> None:
+        headers = await sign_up(client, 'direct_local@gmail.com')
+        response = await client.post(
+            self.upload_url, json={'content_type': 'image/png'}, headers=headers
+        )
+        assert response.status_code == 400
+
+    async def test_upload_and_confirm(
+        self,
+        client: AsyncClient,
+        storage: Path,
+        direct_storage: type[DirectUploadStorage],
+    ) -> None:
+        headers = await sign_up(client, 'direct_confirm@gmail.com')
+        response = await client.post(
+            self.upload_url, json={'content_type': 'image/png'}, headers=headers
+        )
+        assert response.status_code == 200
+        upload = response.json()
+        key = upload['key']
+        assert re.match(AVATAR_UPLOAD_KEY_PATTERN, key)
+        assert upload['fields']['key'] == key
+
+        data = image_bytes(size=(170, 90))
+        store_file(storage, key, data)
+        response = await client.post(self.confirm_url, json={'key': key}, headers=headers)
+        assert response.status_code == 200
+        assert stored_keys(storage) == variant_keys(data), (
+            'Upload was not processed into variants'
+        )
+        assert not is_stored(storage, key), ('Confirmed upload was kept')
+        response = await client.get('/users/me', headers=headers)
+        assert hashlib.sha256(data).hexdigest() in response.json()['profile']['avatar']
+
+    async def test_confirm_key_of_another_user(
+        self,
+        client: AsyncClient,
+        storage: Path,
+        direct_storage: type[DirectUploadStorage],
+    ) -> None:
+        owner = await sign_up(client, 'direct_owner@gmail.com')
+        key = await self.create_upload(client, owner, 'image/png')
+        store_file(storage, key, image_bytes())
+        other = await sign_up(client, 'direct_other@gmail.com')
+        response = await client.post(self.confirm_url, json={'key': key}, headers=other)
+        assert response.status_code == 404, ('Upload of another user was confirmed')
+        assert is_stored(storage, key), ('Upload of another user was deleted')
+
+    async def test_confirm_missing_object(
+        self, client: AsyncClient, direct_storage: type[DirectUploadStorage]
+    ) -> None:
+        headers = await sign_up(client, 'direct_missing@gmail.com')
+        key = await self.create_upload(client, headers, 'image/png')
+        response = await client.post(self.confirm_url, json={'key': key}, headers=headers)
+        assert response.status_code == 404
+
+    @pytest.mark.parametrize(
+        'data,status',
+        [(image_bytes('GIF'), 415), (image_bytes()[:64], 400)],
+    )
+    async def test_confirm_invalid_upload(
+        self,
+        client: AsyncClient,
+        storage: Path,
+        direct_storage: type[DirectUploadStorage],
+        data: bytes,
+        status: int,
+    ) -> None:
+        headers = await sign_up(client, f'direct_invalid_{status}@gmail.com')
+        key = await self.create_upload(client, headers, 'image/png')
+        store_file(storage, key, data)
+        response = await client.post(self.confirm_url, json={'key': key}, headers=headers)
+        assert response.status_code == status
+        assert not stored_keys(storage), ('Invalid upload was processed')
+        assert not is_stored(storage, key), ('Invalid upload was kept')
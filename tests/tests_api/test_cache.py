@@ -0,0 +1,117 @@
+import time
+
+import pytest
+
+from core.settings import settings
+from domain.constants.user_constants import CacheTimeout
+from domain.schemas.user_schemas import ProfileInfoSchema, UserInfoSchema
+from repositories.cache.base_cache import CacheEntry
+from repositories.cache.codecs import (
+    JsonUserInfoCodec,
+    PlainUserInfoCodec,
+    UserInfoHashCodec,
+)
+from repositories.cache.user_redis import UserRedisCache
+
+
+def user_info(user_id: int = 1) -> UserInfoSchema:
+    return UserInfoSchema(
+        user_id=user_id,
+        email='cached@gmail.com',
+        profile=ProfileInfoSchema(first_name='first', last_name='last'),
+    )
+
+
+class TestUserInfoExpiry:
+    def test_refresh_needs_expiry_and_delta(self) -> None:
+        expired = time.time() - 1
+        assert not CacheEntry(user_info(), expires_at=None, delta=1.0).should_refresh()
+        assert not CacheEntry(user_info(), expires_at=expired, delta=0.0).should_refresh()
+
+    def test_refresh_expired_entry(self) -> None:
+        entry = CacheEntry(user_info(), expires_at=time.time() - 1, delta=0.01)
+        assert entry.should_refresh()
+
+    def test_no_refresh_long_before_expiry(self) -> None:
+        entry = CacheEntry(user_info(), expires_at=time.time() + 3600, delta=0.001)
+        assert not any(entry.should_refresh() for _ in range(100))
+
+    def test_new_entry_ttl_jitter(self) -> None:
+        ttl = CacheTimeout.USER_INFO.value
+        before = time.time()
+        entry = UserRedisCache.new_entry(user_info(), delta=0.5, version=3)
+        assert before + ttl * (1 - settings.redis.user_info_ttl_jitter) <= entry.expires_at
+        assert entry.expires_at <= time.time() + ttl
+        assert (entry.delta, entry.version) == (0.5, 3)
+
+
+@pytest.mark.asyncio
+class TestUserRedisCache:
+    async def test_entry_without_expiry_gets_ttl(self) -> None:
+        cache = UserRedisCache()
+        await cache.delete_many(['expiry_none'])
+        written = await cache.set_entries({'expiry_none': CacheEntry(user_info())})
+        assert written == {'expiry_none'}
+        ttl = await cache._connect.pttl(cache._name('expiry_none'))
+        assert 0 < ttl <= CacheTimeout.USER_INFO.value * 1000
+
+    async def test_set_and_get(self) -> None:
+        cache = UserRedisCache()
+        await cache.delete_many(['cas_roundtrip'])
+        await cache.set('cas_roundtrip', user_info(7))
+        entry = await cache.get_entry('cas_roundtrip')
+        assert entry is not None
+        assert entry.value == user_info(7)
+        assert entry.version == 0
+
+    async def test_stale_fill_dropped_after_update(self) -> None:
+        cache = UserRedisCache()
+        await cache.delete_many(['cas_stale'])
+        await cache.set('cas_stale', user_info())
+        await cache.update_profile('cas_stale', {'first_name': 'updated'})
+        entry = await cache.get_entry('cas_stale')
+        assert entry is not None
+        assert entry.value.profile.first_name == 'updated'
+        assert entry.version == 1
+
+        await cache.set('cas_stale', user_info(), version=0)
+        entry = await cache.get_entry('cas_stale')
+        assert entry is not None
+        assert entry.value.profile.first_name == 'updated', ('Stale fill was written')
+
+        await cache.set('cas_stale', user_info(), version=1)
+        entry = await cache.get_entry('cas_stale')
+        assert entry is not None
+        assert entry.value.profile.first_name == 'first'
+
+    async def test_update_of_missing_entry_blocks_fill(self) -> None:
+        cache = UserRedisCache()
+        await cache.delete_many(['cas_tombstone'])
+        await cache.update_profile('cas_tombstone', {'last_name': 'updated'})
+        assert await cache.get_entry('cas_tombstone') is None
+        ttl = await cache._connect.pttl(cache._name('cas_tombstone'))
+        assert 0 < ttl <= settings.redis.user_info_tombstone_ttl
+
+        assert not await cache.set_entries(
+            {'cas_tombstone': cache.new_entry(user_info())}
+        ), ('Fill over a tombstone was written')
+        assert await cache.get_entry('cas_tombstone') is None
+
+
+class TestUserInfoHashCodec:
+    def test_codecs_roundtrip(self) -> None:
+        entry = CacheEntry(user_info(), expires_at=1_700_000_000.0, delta=0.25)
+        for values in (PlainUserInfoCodec(), JsonUserInfoCodec()):
+            codec = UserInfoHashCodec(values)
+            fields = {'ver': '2', **codec.encode(entry)}
+            # values as returned by HMGET
+            raw = [
+                field.encode() if isinstance(field, str) else field
+                for field in map(fields.get, codec.fields)
+            ]
+            assert codec.decode(raw) == entry._replace(version=2)
+
+    def test_json_codec_undecodable_value_is_miss(self) -> None:
+        codec = UserInfoHashCodec(JsonUserInfoCodec())
+        values = [b'0', b'1', b'not json', None, None, None, b'0', b'0']
+        assert codec.decode(values) is None
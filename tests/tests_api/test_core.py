@@ -0,0 +1,271 @@
+import asyncio
+import threading
+import time
+
+import pytest
+from fastapi import FastAPI
+from httpx import AsyncClient
+from jose import jwt
+from sqlalchemy import text
+
+from core.admission import AdmissionLimiter
+from core.exceptions import TooManyRequestsError
+from core.executor import BoundedExecutor
+from core.lru import LRUCache
+from core.metrics import metrics
+from core.settings import settings
+from core.single_flight import SingleFlight
+from domain.constants.auth_constants import TokenEnum
+from domain.exceptions.auth_exceptions import InvalidTokenError
+from domain.services import user_service
+from domain.services.auth_service import JWTService
+from repositories.sql_db.admin.sql_admin import DatabaseSessionMaker, build_admin
+from repositories.sql_db.models.user import Profile
+from repositories.sql_db.session import Database
+from repositories.sql_db.unit_of_work import request_unit_of_work
+from repositories.user_repository import UserRepository
+
+
+@pytest.mark.asyncio
+class TestBoundedExecutor:
+    async def test_run_returns_result(self) -> None:
+        executor = BoundedExecutor('test_executor', kind='thread', workers=2, queue_size=0)
+        try:
+            assert await executor.run(sum, (1, 2, 3)) == 6
+            assert executor.pending == 0
+        finally:
+            executor.shutdown()
+
+    async def test_run_raises_error(self) -> None:
+        executor = BoundedExecutor('test_executor', kind='thread', workers=1, queue_size=0)
+        try:
+            with pytest.raises(ValueError):
+                await executor.run(int, 'not a number')
+            assert executor.pending == 0, ('Failed call was not released')
+        finally:
+            executor.shutdown()
+
+    async def test_calls_over_bound_wait(self) -> None:
+        executor = BoundedExecutor(
+            'test_executor_bound', kind='thread', workers=1, queue_size=1
+        )
+        release = threading.Event()
+        calls = [asyncio.create_task(executor.run(release.wait)) for _ in range(3)]
+        try:
+            await asyncio.sleep(0.1)
+            assert executor.pending == 2, ('Executor accepted calls over its bound')
+            assert metrics.snapshot()['test_executor_bound.queue_depth'] == 2
+        finally:
+            release.set()
+        assert await asyncio.gather(*calls) == [True, True, True]
+        assert executor.pending == 0
+        executor.shutdown()
+
+
+@pytest.mark.asyncio
+class TestAdmissionLimiter:
+    async def test_rejects_over_queue(self) -> None:
+        limiter = AdmissionLimiter('test_limiter', limit=1, max_queue=1, retry_after=3)
+        release = asyncio.Event()
+
+        async def hold() -> None:
+            async with limiter:
+                await release.wait()
+
+        callers = [asyncio.create_task(hold()) for _ in range(2)]
+        await asyncio.sleep(0)
+        with pytest.raises(TooManyRequestsError) as error:
+            async with limiter:
+                pass
+        assert error.value.headers == {'Retry-After': '3'}
+        release.set()
+        await asyncio.gather(*callers)
+        async with limiter:
+            pass
+
+    async def test_queued_caller_is_admitted(self) -> None:
+        limiter = AdmissionLimiter('test_limiter', limit=1, max_queue=1, retry_after=3)
+        order = []
+
+        async def call(name: str) -> None:
+            async with limiter:
+                order.append(name)
+                await asyncio.sleep(0.01)
+
+        await asyncio.gather(call('first'), call('second'))
+        assert order == ['first', 'second']
+
+    async def test_signup_shed_with_429(
+        self, client: AsyncClient, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        monkeypatch.setattr(
+            user_service,
+            'signup_limiter',
+            AdmissionLimiter('test_signup', limit=0, max_queue=0, retry_after=5),
+        )
+        response = await client.post(
+            '/users/signup',
+            json={
+                'email': 'shed@gmail.com',
+                'password': 'password123PASS@',
+                're_password': 'password123PASS@',
+            }
+        )
+        assert response.status_code == 429
+        assert response.headers['retry-after'] == '5'
+
+
+class TestLRUCache:
+    def test_evicts_least_recently_used(self) -> None:
+        cache: LRUCache[str, int] = LRUCache('test_lru', max_size=2)
+        cache.set('first', 1)
+        cache.set('second', 2)
+        assert cache.get('first') == 1
+        cache.set('third', 3)
+        assert cache.get('second') is None, ('Recently used entry was evicted')
+        assert cache.get('first') == 1
+        assert cache.get('third') == 3
+        assert len(cache) == 2
+
+    def test_expired_entry_is_dropped(self) -> None:
+        cache: LRUCache[str, int] = LRUCache('test_lru', max_size=2)
+        cache.set('expired', 1, expires_at=time.time() - 1)
+        cache.set('valid', 2, expires_at=time.time() + 60)
+        assert cache.get('expired') is None
+        assert cache.get('valid') == 2
+        assert len(cache) == 1
+
+
+class TestVerifiedTokens:
+    def test_access_token_verified_twice(self) -> None:
+        token = JWTService.create_tokens(42).access_token
+        assert JWTService.get_user_id_from_access_token(token) == 42
+        assert JWTService.get_user_id_from_access_token(token) == 42
+
+    def test_cached_token_type_is_checked(self) -> None:
+        token = JWTService.create_tokens(42).access_token
+        JWTService.get_user_id_from_access_token(token)
+        with pytest.raises(InvalidTokenError):
+            JWTService.create_access_token_by_refresh(token)
+
+    def test_token_without_exp(self) -> None:
+        token = jwt.encode(
+            {'user_id': 42, 'token_type': TokenEnum.access.value},
+            settings.token.secret_key,
+            algorithm=TokenEnum.ALGORITHM.value,
+        )
+        with pytest.raises(InvalidTokenError):
+            JWTService.get_user_id_from_access_token(token)
+
+
+@pytest.mark.asyncio
+class TestSingleFlight:
+    async def test_concurrent_calls_shared(self) -> None:
+        flight: SingleFlight[int] = SingleFlight('test_flight')
+        calls = 0
+
+        async def load() -> int:
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            return calls
+
+        results = await asyncio.gather(*(flight.do('key', load) for _ in range(5)))
+        assert results == [1] * 5
+        assert calls == 1, ('Concurrent calls were not shared')
+        assert await flight.do('key', load) == 2, ('Finished call was reused')
+
+    async def test_error_raised_to_all_callers(self) -> None:
+        flight: SingleFlight[int] = SingleFlight('test_flight')
+
+        async def fail() -> int:
+            await asyncio.sleep(0.01)
+            raise ValueError
+
+        results = await asyncio.gather(
+            *(flight.do('key', fail) for _ in range(3)), return_exceptions=True
+        )
+        assert all(isinstance(result, ValueError) for result in results)
+
+    async def test_cancelled_caller_does_not_cancel_call(self) -> None:
+        flight: SingleFlight[str] = SingleFlight('test_flight')
+
+        async def load() -> str:
+            await asyncio.sleep(0.01)
+            return 'loaded'
+
+        cancelled = asyncio.create_task(flight.do('key', load))
+        waiting = asyncio.create_task(flight.do('key', load))
+        await asyncio.sleep(0)
+        cancelled.cancel()
+        assert await waiting == 'loaded'
+        with pytest.raises(asyncio.CancelledError):
+            await cancelled
+
+
+@pytest.mark.asyncio
+class TestUnitOfWork:
+    sign_up_url = '/users/signup'
+
+    async def sign_up(self, client: AsyncClient, email: str) -> int:
+        response = await client.post(
+            self.sign_up_url,
+            json={
+                'email': email,
+                'password': 'password123PASS@',
+                're_password': 'password123PASS@',
+            }
+        )
+        return response.json()['user_id']
+
+    @staticmethod
+    async def stored_avatar(user_id: int) -> str | None:
+        async with Database().get_session() as db:
+            profile = await db.get(Profile, user_id)
+            return profile.avatar if profile else None
+
+    async def test_commit_updates_cache(self, client: AsyncClient) -> None:
+        user_id = await self.sign_up(client, 'uow_commit@gmail.com')
+        repository = UserRepository()
+        unit_of_work = request_unit_of_work()
+        await anext(unit_of_work)
+        await repository.update_user_avatar(user_id, 'committed')
+        with pytest.raises(StopAsyncIteration):
+            await anext(unit_of_work)
+        assert await self.stored_avatar(user_id) == 'committed'
+        schema = await repository.get_user_info_by_id(user_id)
+        assert schema is not None
+        assert schema.profile.avatar == 'committed'
+
+    async def test_rollback_skips_cache_update(self, client: AsyncClient) -> None:
+        user_id = await self.sign_up(client, 'uow_rollback@gmail.com')
+        repository = UserRepository()
+        unit_of_work = request_unit_of_work()
+        await anext(unit_of_work)
+        await repository.update_user_avatar(user_id, 'rolled_back')
+        with pytest.raises(RuntimeError):
+            await unit_of_work.athrow(RuntimeError)
+        assert await self.stored_avatar(user_id) is None, ('Write was not rolled back')
+        schema = await repository.get_user_info_by_id(user_id)
+        assert schema is not None
+        assert schema.profile.avatar is None, ('Cache saw rolled back data')
+
+
+@pytest.mark.asyncio
+class TestAdminSessions:
+    async def test_admin_built_without_engine(self) -> None:
+        await Database.disconnect()
+        build_admin(FastAPI())
+        assert Database._engine is None, ('Engine was created with the app')
+
+    async def test_session_bound_to_current_engine(self) -> None:
+        session_maker = DatabaseSessionMaker()
+        engine = Database().engine
+        async with session_maker() as session:
+            assert session.bind is engine
+            assert (await session.execute(text('SELECT 1'))).scalar() == 1
+        await Database.disconnect()
+        async with session_maker() as session:
+            assert session.bind is not engine, ('Session used disposed engine')
+            assert session.bind is Database().engine
+            assert (await session.execute(text('SELECT 1'))).scalar() == 1
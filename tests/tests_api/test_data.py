@@ -1,6 +1,7 @@
 registration_data = [
     ('11111@yandex.ru', 'asdASD123@', 'asdASD123@', 'firstName', 'lastName', 201),
     ('11111@yandex.ru', 'asdASD123@', 'asdASD123@', 'firstName', 'lastName', 400),
+    ('11111@Yandex.RU', 'asdASD123@', 'asdASD123@', 'firstName', 'lastName', 400),
     ('@yandex.ru', 'asdASD123@', 'asdASD123@', 'firstName', 'lastName', 422),
     ('122yandex', 'asdASD123@', 'asdASD123@', 'firstName', 'lastName', 422),
     ('asd@yandex', 'asdASD123@', 'asdASD123@', 'firstName', 'lastName', 422),
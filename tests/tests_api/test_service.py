@@ -0,0 +1,51 @@
+import pytest
+from httpx import AsyncClient
+
+from domain.services.auth_service import JWTService
+from domain.services.user_service import HashService
+from repositories.sql_db.models import User
+from repositories.sql_db.models.user import Profile
+from repositories.sql_db.session import Database
+
+
+@pytest.mark.asyncio
+class TestServiceMetrics:
+    url = '/service/metrics'
+    sign_up_url = '/users/signup'
+
+    async def test_metrics_without_token(self, client: AsyncClient) -> None:
+        response = await client.get(self.url)
+        assert response.status_code == 403
+
+    async def test_metrics_regular_user(self, client: AsyncClient) -> None:
+        response = await client.post(
+            self.sign_up_url,
+            json={
+                'email': 'metrics_user@gmail.com',
+                'password': 'password123PASS@',
+                're_password': 'password123PASS@',
+            }
+        )
+        token = JWTService.create_tokens(response.json()['user_id']).access_token
+        response = await client.get(
+            self.url, headers={'Authorization': f'Bearer {token}'}
+        )
+        assert response.status_code == 403, ('Metrics available to regular user')
+
+    async def test_metrics_super_user(self, client: AsyncClient) -> None:
+        admin = User(
+            email='metrics_admin@gmail.com',
+            password=HashService.hash_password('fakepass'),
+            is_active=True,
+            is_super_user=True,
+        )
+        admin.profile = Profile()
+        async with Database().get_session() as db:
+            db.add(admin)
+            await db.commit()
+        token = JWTService.create_tokens(admin.user_id).access_token
+        response = await client.get(
+            self.url, headers={'Authorization': f'Bearer {token}'}
+        )
+        assert response.status_code == 200, ('Metrics not available to super user')
+        assert isinstance(response.json(), dict)
@@ -5,7 +5,10 @@ from httpx import AsyncClient
 
 from .test_data import registration_data
 from .utils import get_code_capsys
-from repositories.sql_db.models.user import User
+from domain.services.auth_service import JWTService
+from domain.services.user_service import HashService
+from repositories.sql_db.models.user import Profile, User
+from repositories.sql_db.session import Database
 
 
 @pytest.mark.asyncio
@@ -190,3 +193,90 @@ class TestUserConfirmation:
             json=data
         )
         assert response.status_code == 200, ('Failed reset password')
+
+    async def test_reset_password_request_email_case(self, client: AsyncClient) -> None:
+        data = {
+            'email': 'email_case@gmail.com',
+            'password': 'password123PASS@',
+            're_password': 'password123PASS@',
+        }
+        await client.post(self.sign_up_url, json=data)
+        response = await client.post(
+            self.reset_password_request,
+            json={'email': data['email'].upper()}
+        )
+        assert response.status_code == 200, ('Email lookup is case sensitive')
+
+
+@pytest.fixture(scope="function")
+async def admin_headers() -> dict[str, str]:
+    """Authorization headers of a super user."""
+    admin = User(
+        email=f'batch_admin_{random.randint(0, 10**9)}@gmail.com',
+        password=HashService.hash_password('fakepass'),
+        is_active=True,
+        is_super_user=True,
+    )
+    admin.profile = Profile()
+    async with Database().get_session() as db:
+        db.add(admin)
+        await db.commit()
+    token = JWTService.create_tokens(admin.user_id).access_token
+    return {'Authorization': f'Bearer {token}'}
+
+
+@pytest.mark.asyncio
+class TestUserBatch:
+    sign_up_url = '/users/signup'
+    batch_url = '/users/batch'
+
+    async def test_batch_user_info(
+        self, client: AsyncClient, admin_headers: dict[str, str]
+    ) -> None:
+        user_ids = []
+        for email in ('batch_first@gmail.com', 'batch_second@gmail.com'):
+            response = await client.post(
+                self.sign_up_url,
+                json={
+                    'email': email,
+                    'password': 'password123PASS@',
+                    're_password': 'password123PASS@',
+                }
+            )
+            user_ids.append(response.json()['user_id'])
+        response = await client.post(
+            self.batch_url,
+            json={'user_ids': [*user_ids, max(user_ids) + 1000]},
+            headers=admin_headers,
+        )
+        assert response.status_code == 200, ('Failed batch user info')
+        assert [user['user_id'] for user in response.json()] == user_ids
+
+    async def test_batch_regular_user(self, client: AsyncClient) -> None:
+        response = await client.post(
+            self.sign_up_url,
+            json={
+                'email': 'batch_regular@gmail.com',
+                'password': 'password123PASS@',
+                're_password': 'password123PASS@',
+            }
+        )
+        token = JWTService.create_tokens(response.json()['user_id']).access_token
+        response = await client.post(
+            self.batch_url,
+            json={'user_ids': [1]},
+            headers={'Authorization': f'Bearer {token}'},
+        )
+        assert response.status_code == 403, ('Batch user info available to regular user')
+
+    async def test_batch_without_token(self, client: AsyncClient) -> None:
+        response = await client.post(self.batch_url, json={'user_ids': [1]})
+        assert response.status_code == 403
+
+    async def test_batch_empty_ids(
+        self, client: AsyncClient, admin_headers: dict[str, str]
+    ) -> None:
+        response = await client.post(
+            self.batch_url, json={'user_ids': []}, headers=admin_headers
+        )
+        assert response.status_code == 422
@@ -1,25 +1,96 @@
-from aio_pika import DeliveryMode, Message, connect
+import asyncio
+from typing import Any
+
+from aio_pika import DeliveryMode, Message, connect_robust
+from aio_pika.abc import AbstractChannel, AbstractExchange, AbstractRobustConnection
+from aio_pika.pool import Pool, PoolInstance
 
 from adapters.broker.notify_base import INotifyService
 from adapters.broker.rabbitmq.rabbit_constants import EXPIRES_EMAIL, AMQPValue
+from core.metrics import metrics
 from core.settings import settings
 from domain.schemas.notify_schemas import NotifySendSchema
 
 
+class PooledExchange(PoolInstance):
+    """Pooled channel with its exchange, the pool closes the channel."""
+
+    def __init__(self, channel: AbstractChannel, exchange: AbstractExchange) -> None:
+        self.channel = channel
+        self.exchange = exchange
+
+    async def close(self) -> None:
+        await self.channel.close()
+
+
 class RabbitMQNotifyService(INotifyService):
-    async def notify(self, schema: NotifySendSchema, expires: bool = True) -> None:
-        connection = await connect(settings.amqp.amqp_url)
-        async with connection:
-            channel = await connection.channel()
+    """Publisher sharing one robust connection and a pool of channels per process.
 
-            exchange = await channel.get_exchange(AMQPValue.exchange_name.value)
+    Every pooled channel looks the exchange up once and keeps it, so publishing
+    a message costs a single frame on an already open channel. The connection is
+    opened by the first notification, a failed attempt is retried by the next
+    one, so the app starts while RabbitMQ is unreachable.
+    """
 
-            message = Message(
-                schema.model_dump_json().encode(),
-                delivery_mode=DeliveryMode.PERSISTENT,
-                expiration=EXPIRES_EMAIL if expires else None,
-            )
-            await exchange.publish(
+    _connection: AbstractRobustConnection | None = None
+    _exchanges: Pool[PooledExchange] | None = None
+    _lock = asyncio.Lock()
+
+    @classmethod
+    async def connect(cls) -> None:
+        """Open robust connection and channel pool if they are not open yet."""
+        if cls._exchanges is not None:
+            return
+        async with cls._lock:
+            if cls._connection is None:
+                cls._connection = await connect_robust(settings.amqp.amqp_url)
+                cls._connection.reconnect_callbacks.add(cls._on_reconnect)
+                cls._connection.close_callbacks.add(cls._on_close)
+                metrics.set('amqp.connected', 1)
+            if cls._exchanges is None:
+                cls._exchanges = Pool(
+                    cls._open_exchange, max_size=settings.amqp.amqp_channel_pool_size
+                )
+
+    @classmethod
+    async def disconnect(cls) -> None:
+        """Close channel pool and connection."""
+        if cls._exchanges is not None:
+            await cls._exchanges.close()
+        if cls._connection is not None:
+            await cls._connection.close()
+        cls._exchanges = None
+        cls._connection = None
+        metrics.set('amqp.connected', 0)
+
+    @classmethod
+    async def _open_exchange(cls) -> PooledExchange:
+        assert cls._connection is not None
+        channel = await cls._connection.channel()
+        metrics.inc('amqp.channels_opened')
+        exchange = await channel.get_exchange(AMQPValue.exchange_name.value)
+        return PooledExchange(channel, exchange)
+
+    @staticmethod
+    def _on_reconnect(*args: Any) -> None:
+        metrics.inc('amqp.reconnects')
+        metrics.set('amqp.connected', 1)
+
+    @staticmethod
+    def _on_close(*args: Any) -> None:
+        metrics.set('amqp.connected', 0)
+
+    async def notify(self, schema: NotifySendSchema, expires: bool = True) -> None:
+        await self.connect()
+        assert self._exchanges is not None
+        message = Message(
+            schema.model_dump_json().encode(),
+            delivery_mode=DeliveryMode.PERSISTENT,
+            expiration=EXPIRES_EMAIL if expires else None,
+        )
+        async with self._exchanges.acquire() as pooled:
+            await pooled.exchange.publish(
                 message,
                 routing_key=AMQPValue.routing_key.value,
             )
+        metrics.inc('amqp.published')
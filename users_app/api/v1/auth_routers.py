@@ -10,9 +10,14 @@ from domain.schemas.auth_schemas import (
 )
 from domain.services.auth_service import JWTService
 from domain.services.user_service import UserService
+from repositories.sql_db.unit_of_work import request_unit_of_work
 
 
-auth_router = APIRouter(prefix='/auth', tags=['auth'])
+auth_router = APIRouter(
+    prefix='/auth',
+    tags=['auth'],
+    dependencies=[Depends(request_unit_of_work)],
+)
 
 
 @auth_router.post('/login')
@@ -1,27 +1,132 @@
-from typing import Annotated
+from collections.abc import AsyncIterator, Callable, Coroutine
+from typing import Annotated, Any
 
-from fastapi import APIRouter, Depends, UploadFile
+from fastapi import APIRouter, Depends, Path, Request, Response, UploadFile
+from fastapi.responses import RedirectResponse
+from fastapi.routing import APIRoute
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 
-from domain.schemas.avatar_schemas import AvatarSchema
+from core.responses import RangeFileResponse
+from core.settings import settings
+from domain.constants.avatar_constants import (
+    AVATAR_CACHE_CONTROL,
+    AVATAR_CHUNK_SIZE,
+    AVATAR_KEY_PATTERN,
+    AVATAR_MAX_BODY_SIZE,
+)
+from domain.exceptions.avatar_exceptions import (
+    AvatarLengthRequiredError,
+    AvatarTooLargeError,
+)
+from domain.schemas.avatar_schemas import (
+    AvatarConfirmSchema,
+    AvatarUploadRequestSchema,
+    AvatarUploadSchema,
+)
 from domain.schemas.common_schemas import SuccessResponse
 from domain.services.auth_service import PermissionService
-from domain.services.avatar_service import UserAvatarSetService
+from domain.services.avatar_service import AvatarGetService, UserAvatarSetService
+from repositories.sql_db.unit_of_work import request_unit_of_work
 
 
-avatar_router = APIRouter(prefix='/avatars', tags=['avatars'])
+class AvatarUploadRoute(APIRoute):
+    """Route checking the token and the declared length before the body is read.
+
+    FastAPI parses and spools multipart forms before resolving dependencies,
+    so the checks run here, before the handler parses the form.
+    """
+
+    def get_route_handler(self) -> Callable[[Request], Coroutine[Any, Any, Response]]:
+        route_handler = super().get_route_handler()
+
+        async def upload_route_handler(request: Request) -> Response:
+            auth_headers = await HTTPBearer()(request)
+            assert auth_headers is not None
+            PermissionService.get_current_user_id(auth_headers.credentials)
+            content_length = request.headers.get('content-length')
+            if content_length is None or not content_length.isdigit():
+                raise AvatarLengthRequiredError
+            if int(content_length) > AVATAR_MAX_BODY_SIZE:
+                raise AvatarTooLargeError
+            return await route_handler(request)
+
+        return upload_route_handler
+
+
+avatar_router = APIRouter(
+    prefix='/avatars',
+    tags=['avatars'],
+    dependencies=[Depends(request_unit_of_work)],
+)
 
 
-@avatar_router.post('')
 async def set_avatar(
     file: UploadFile,
     auth_headers: Annotated[HTTPAuthorizationCredentials, Depends(HTTPBearer())],
     service: Annotated[UserAvatarSetService, Depends(UserAvatarSetService)],
 ) -> SuccessResponse:
+    """Set avatar from uploaded image, read in chunks.
+
+    ``AvatarUploadRoute`` checks the token and the declared length first.
+    """
+    user_id = PermissionService.get_current_user_id(auth_headers.credentials)
+    return await service.set(user_id, _read_chunks(file), file.size)
+
+
+avatar_router.add_api_route(
+    '', set_avatar, methods=['POST'], route_class_override=AvatarUploadRoute
+)
+
+
+@avatar_router.post('/upload-url')
+async def create_avatar_upload(
+    schema: AvatarUploadRequestSchema,
+    auth_headers: Annotated[HTTPAuthorizationCredentials, Depends(HTTPBearer())],
+    service: Annotated[UserAvatarSetService, Depends(UserAvatarSetService)],
+) -> AvatarUploadSchema:
+    """Get form to upload avatar directly to the storage, confirm it afterwards."""
+    user_id = PermissionService.get_current_user_id(auth_headers.credentials)
+    return await service.create_upload(user_id, schema.content_type)
+
+
+@avatar_router.post('/confirm')
+async def confirm_avatar_upload(
+    schema: AvatarConfirmSchema,
+    auth_headers: Annotated[HTTPAuthorizationCredentials, Depends(HTTPBearer())],
+    service: Annotated[UserAvatarSetService, Depends(UserAvatarSetService)],
+) -> SuccessResponse:
+    """Set avatar uploaded directly to the storage."""
     user_id = PermissionService.get_current_user_id(auth_headers.credentials)
-    schema = AvatarSchema(
-        file_bytes=await file.read(),
-        file_size=file.size,
-        mime_type=file.content_type,
-    )
-    return await service.set(user_id, schema)
+    return await service.confirm_upload(user_id, schema.key)
+
+
+@avatar_router.get('/{key:path}', response_class=RangeFileResponse)
+@avatar_router.head(
+    '/{key:path}', response_class=RangeFileResponse, include_in_schema=False
+)
+async def get_avatar(
+    key: Annotated[str, Path(pattern=AVATAR_KEY_PATTERN)],
+    service: Annotated[AvatarGetService, Depends(AvatarGetService)],
+) -> Response:
+    """Serve avatar file, avatars in S3 are redirected to a presigned URL."""
+    location = await service.locate(key)
+    if location.url is not None:
+        # The URL is reused for half of its lifetime, the redirect is cached for
+        # a quarter, so a cached redirect never points to an expired URL.
+        max_age = settings.storage.avatar_url_ttl // 4
+        return RedirectResponse(
+            location.url,
+            status_code=302,
+            headers={'Cache-Control': f'private, max-age={max_age}'},
+        )
+    assert location.path is not None
+    if service.is_immutable(key):
+        headers = {'Cache-Control': AVATAR_CACHE_CONTROL, 'ETag': f'"{key}"'}
+    else:
+        headers = {'Cache-Control': 'no-cache'}
+    return RangeFileResponse(location.path, headers=headers, stat_result=location.stat)
+
+
+async def _read_chunks(file: UploadFile) -> AsyncIterator[bytes]:
+    while chunk := await file.read(AVATAR_CHUNK_SIZE):
+        yield chunk
@@ -0,0 +1,14 @@
+from typing import Annotated
+
+from fastapi import Depends
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
+
+from domain.services.auth_service import AdminPermissionService
+
+
+async def admin_required(
+    auth_headers: Annotated[HTTPAuthorizationCredentials, Depends(HTTPBearer())],
+    service: Annotated[AdminPermissionService, Depends(AdminPermissionService)],
+) -> None:
+    """Allow staff and super users only."""
+    await service.get_admin_id(auth_headers.credentials)
@@ -0,0 +1,13 @@
+from fastapi import APIRouter, Depends
+
+from api.v1.dependencies import admin_required
+from core.metrics import metrics
+
+
+service_router = APIRouter(prefix='/service', tags=['service'])
+
+
+@service_router.get('/metrics', dependencies=[Depends(admin_required)])
+async def get_metrics() -> dict[str, float | dict[str, float]]:
+    """Get metrics of the current worker, for staff and super users only."""
+    return metrics.snapshot()
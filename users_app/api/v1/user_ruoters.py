@@ -3,6 +3,7 @@ from typing import Annotated
 from fastapi import APIRouter, Depends
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 
+from api.v1.dependencies import admin_required
 from domain.schemas.common_schemas import SuccessResponse
 from domain.schemas.user_schemas import (
     ConfirmationUserSchema,
@@ -10,14 +11,20 @@ from domain.schemas.user_schemas import (
     ProfileSchema,
     ProfileUpdateSchema,
     ResetPasswordSchema,
+    UserIdsSchema,
     UserInfoSchema,
     UserRegistrationInputSchema,
 )
 from domain.services.auth_service import PermissionService
 from domain.services.user_service import UserService
+from repositories.sql_db.unit_of_work import request_unit_of_work
 
 
-user_router = APIRouter(prefix='/users', tags=['users'])
+user_router = APIRouter(
+    prefix='/users',
+    tags=['users'],
+    dependencies=[Depends(request_unit_of_work)],
+)
 
 
 @user_router.post('/signup', status_code=201)
@@ -39,6 +46,18 @@ async def get_current_user_info(
     return await service.get_user_info_by_id(user_id)
 
 
+@user_router.post('/batch', dependencies=[Depends(admin_required)])
+async def get_users_info(
+    schema: UserIdsSchema,
+    service: Annotated[UserService, Depends(UserService)],
+) -> list[UserInfoSchema]:
+    """Get info of several users for services, unknown ids are skipped.
+
+    Emails of other users are exposed, so only staff and super users are allowed.
+    """
+    return await service.get_user_infos_by_ids(schema.user_ids)
+
+
 @user_router.patch('/me')
 async def update_current_user_info(
     auth_headers: Annotated[HTTPAuthorizationCredentials, Depends(HTTPBearer())],
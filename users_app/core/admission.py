@@ -0,0 +1,41 @@
+import asyncio
+from types import TracebackType
+
+from core.exceptions import TooManyRequestsError
+from core.metrics import metrics
+
+
+class AdmissionLimiter:
+    """Per-worker concurrency limit shedding callers once its queue is full.
+
+    Up to ``limit`` callers run at once and up to ``max_queue`` wait for a slot,
+    any further caller is rejected immediately with ``TooManyRequestsError``.
+    """
+
+    def __init__(self, name: str, limit: int, max_queue: int, retry_after: int) -> None:
+        self._name = name
+        self._semaphore = asyncio.Semaphore(limit)
+        self._max_queue = max_queue
+        self._retry_after = retry_after
+        self._waiting = 0
+
+    async def __aenter__(self) -> None:
+        if self._semaphore.locked() and self._waiting >= self._max_queue:
+            metrics.inc(f'{self._name}.rejected')
+            raise TooManyRequestsError(self._retry_after)
+        self._waiting += 1
+        metrics.set(f'{self._name}.waiting', self._waiting)
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self._waiting -= 1
+            metrics.set(f'{self._name}.waiting', self._waiting)
+        metrics.inc(f'{self._name}.admitted')
+
+    async def __aexit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        self._semaphore.release()
@@ -1,32 +1,68 @@
+from collections.abc import AsyncGenerator
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 
 from adapters.broker.notify_base import INotifyService
 from adapters.broker.rabbitmq.rabbit_notify import RabbitMQNotifyService
 from api.v1.routers import get_routers_v1
 from core.dependency import impl
-from core.exception_handler import ExceptionHandlerMiddleware
+from core.exception_handler import add_exception_handlers
+from core.settings import settings
+from core.timing import ServerTimingMiddleware
+from domain.services.avatar_service import avatar_executor
+from domain.services.user_service import hash_executor
 from repositories.cache.base_cache import IUserBaseCache, IUserCodeCache
 from repositories.cache.user_redis import UserCodeRedisCache, UserRedisCache
+from repositories.cache.user_two_tier import UserTwoTierCache
 from repositories.repository import IUserRepository
 from repositories.sql_db.admin.sql_admin import build_admin
+from repositories.sql_db.session import Database
 from repositories.storage.base import IStorage
+from repositories.storage.local import LocalStorage
 from repositories.storage.s3 import S3Storage
+from repositories.storage.s3client import ClientS3
 from repositories.user_repository import UserRepository
 
 
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
+    Database.connect()
+    if settings.storage.storage_backend == 's3':
+        await ClientS3.connect()
+        await S3Storage.expire_uploads()
+    if settings.redis.user_info_l1_enabled:
+        UserTwoTierCache.start_listener()
+    yield
+    await UserTwoTierCache.stop_listener()
+    await ClientS3.disconnect()
+    await RabbitMQNotifyService.disconnect()
+    await Database.disconnect()
+    hash_executor.shutdown()
+    avatar_executor.shutdown()
+
+
 def build_app() -> FastAPI:
     injections = (
         (IUserRepository, UserRepository),
-        (IUserBaseCache, UserRedisCache),
+        (
+            IUserBaseCache,
+            UserTwoTierCache if settings.redis.user_info_l1_enabled else UserRedisCache,
+        ),
         (INotifyService, RabbitMQNotifyService),
-        (IStorage, S3Storage),
+        (
+            IStorage,
+            S3Storage if settings.storage.storage_backend == 's3' else LocalStorage,
+        ),
         (IUserCodeCache, UserCodeRedisCache),
     )
     impl.register_all(injections)
     app = FastAPI(
         docs_url='/api/docs',
+        lifespan=lifespan,
     )
     build_admin(app)
     app.include_router(get_routers_v1())
-    app.add_middleware(ExceptionHandlerMiddleware)
+    add_exception_handlers(app)
+    app.add_middleware(ServerTimingMiddleware)
     return app
@@ -1,15 +1,18 @@
-from fastapi import Request
+from fastapi import FastAPI, Request
 from fastapi.responses import JSONResponse
-from starlette.middleware.base import BaseHTTPMiddleware
 
 from core.exceptions import AppException
 
 
-class ExceptionHandlerMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request: Request, call_next):
-        try:
-            return await call_next(request)
-        except AppException as error:
-            return JSONResponse(
-                status_code=error.status_code, content={'error_detail': error.detail}
-            )
+async def app_exception_handler(request: Request, error: Exception) -> JSONResponse:
+    # Registered for AppException only, Starlette types handlers with Exception.
+    assert isinstance(error, AppException)
+    return JSONResponse(
+        status_code=error.status_code,
+        content={'error_detail': error.detail},
+        headers=error.headers,
+    )
+
+
+def add_exception_handlers(app: FastAPI) -> None:
+    app.add_exception_handler(AppException, app_exception_handler)
@@ -1,3 +1,13 @@
 class AppException(Exception):
     status_code: int
     detail: str
+    headers: dict[str, str] | None = None
+
+
+class TooManyRequestsError(AppException):
+    status_code = 429
+    detail = 'Too many requests'
+
+    def __init__(self, retry_after: int) -> None:
+        super().__init__(self.detail)
+        self.headers = {'Retry-After': str(retry_after)}
@@ -0,0 +1,79 @@
+import asyncio
+import time
+from collections.abc import Callable
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from typing import Literal, TypeVar
+
+from core.metrics import metrics
+from core.timing import timed
+
+
+T = TypeVar('T')
+
+
+def _call_started(fn: Callable[..., T], *args: object) -> tuple[float, T]:
+    """Run function in a worker and return time it has been started at."""
+    return time.monotonic(), fn(*args)
+
+
+class BoundedExecutor:
+    """Thread or process pool running blocking calls off the event loop.
+
+    At most ``workers + queue_size`` calls are accepted at once, further
+    callers wait for a free slot. Queue depth and wait time of accepted
+    calls are exposed as ``{name}.*`` metrics.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        kind: Literal['thread', 'process'],
+        workers: int,
+        queue_size: int,
+    ) -> None:
+        self._name = name
+        self._kind = kind
+        self._workers = workers
+        self._slots = asyncio.Semaphore(workers + queue_size)
+        self._executor: Executor | None = None
+        self._pending = 0
+
+    @property
+    def pending(self) -> int:
+        """Calls accepted by the executor and not finished yet."""
+        return self._pending
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self._kind == 'process':
+                self._executor = ProcessPoolExecutor(max_workers=self._workers)
+            else:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self._workers, thread_name_prefix=self._name
+                )
+        return self._executor
+
+    async def run(self, fn: Callable[..., T], *args: object) -> T:
+        """Run blocking function in the pool and wait for its result."""
+        submitted = time.monotonic()
+        with timed(self._name):
+            async with self._slots:
+                self._pending += 1
+                metrics.set(f'{self._name}.queue_depth', self._pending)
+                try:
+                    started, result = await asyncio.get_running_loop().run_in_executor(
+                        self._get_executor(), partial(_call_started, fn, *args)
+                    )
+                finally:
+                    self._pending -= 1
+                    metrics.set(f'{self._name}.queue_depth', self._pending)
+        metrics.observe(f'{self._name}.wait_seconds', started - submitted)
+        metrics.observe(f'{self._name}.run_seconds', time.monotonic() - started)
+        return result
+
+    def shutdown(self) -> None:
+        """Shutdown the pool, a new one is created on the next call."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+        self._executor = None
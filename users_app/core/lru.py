@@ -0,0 +1,52 @@
+import time
+from collections import OrderedDict
+from typing import Generic, TypeVar
+
+from core.metrics import metrics
+
+
+K = TypeVar('K')
+V = TypeVar('V')
+
+
+class LRUCache(Generic[K, V]):
+    """Size-bounded in-process LRU mapping with optional per-entry expiry.
+
+    Hits and misses are counted as ``{name}.hits`` and ``{name}.misses`` metrics.
+    """
+
+    def __init__(self, name: str, max_size: int) -> None:
+        self._name = name
+        self._max_size = max_size
+        self._data: OrderedDict[K, tuple[V, float | None]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: K) -> V | None:
+        """Get value and mark it as recently used, expired values are dropped."""
+        entry = self._data.get(key)
+        if entry is None:
+            metrics.inc(f'{self._name}.misses')
+            return None
+        value, expires_at = entry
+        if expires_at is not None and expires_at <= time.time():
+            del self._data[key]
+            metrics.inc(f'{self._name}.misses')
+            return None
+        self._data.move_to_end(key)
+        metrics.inc(f'{self._name}.hits')
+        return value
+
+    def set(self, key: K, value: V, expires_at: float | None = None) -> None:
+        """Set value expiring at unix time ``expires_at``, evicting the oldest one."""
+        self._data[key] = (value, expires_at)
+        self._data.move_to_end(key)
+        if len(self._data) > self._max_size:
+            self._data.popitem(last=False)
+
+    def delete(self, key: K) -> None:
+        self._data.pop(key, None)
+
+    def clear(self) -> None:
+        self._data.clear()
@@ -0,0 +1,40 @@
+from collections import defaultdict
+from threading import Lock
+
+
+class Metrics:
+    """In-process counters, gauges and timing summaries of a worker."""
+
+    def __init__(self) -> None:
+        self._lock = Lock()
+        self._counters: defaultdict[str, int] = defaultdict(int)
+        self._gauges: dict[str, float] = {}
+        self._summaries: dict[str, dict[str, float]] = {}
+
+    def inc(self, name: str, value: int = 1) -> None:
+        with self._lock:
+            self._counters[name] += value
+
+    def set(self, name: str, value: float) -> None:
+        with self._lock:
+            self._gauges[name] = value
+
+    def observe(self, name: str, value: float) -> None:
+        with self._lock:
+            summary = self._summaries.setdefault(
+                name, {'count': 0, 'sum': 0.0, 'max': 0.0}
+            )
+            summary['count'] += 1
+            summary['sum'] += value
+            summary['max'] = max(summary['max'], value)
+
+    def snapshot(self) -> dict[str, float | dict[str, float]]:
+        with self._lock:
+            return {
+                **self._counters,
+                **self._gauges,
+                **{name: dict(value) for name, value in self._summaries.items()},
+            }
+
+
+metrics = Metrics()
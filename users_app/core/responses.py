@@ -0,0 +1,141 @@
+import os
+
+import anyio
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse, Response
+from starlette.types import Receive, Scope, Send
+
+
+ZEROCOPY_SEND = 'http.response.zerocopysend'
+PATH_SEND = 'http.response.pathsend'
+
+
+class RangeNotSatisfiableError(Exception):
+    pass
+
+
+class RangeFileResponse(FileResponse):
+    """File response answering conditional and single range requests.
+
+    ``If-None-Match`` matching the ETag gets 304, a single ``bytes`` range gets
+    206 or 416 when it starts past the end of the file, other ranges get the
+    whole file. Servers offering the ASGI zero-copy send extension transfer the
+    file with ``sendfile``, others get it in chunks read in a worker thread.
+    """
+
+    def set_stat_headers(self, stat_result: os.stat_result) -> None:
+        super().set_stat_headers(stat_result)
+        self.headers.setdefault('accept-ranges', 'bytes')
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if self.stat_result is None:
+            raise RuntimeError('RangeFileResponse needs stat_result of the file.')
+        request_headers = Headers(scope=scope)
+        if self._is_not_modified(request_headers):
+            await self._not_modified()(scope, receive, send)
+            return
+        size = self.stat_result.st_size
+        try:
+            byte_range = self._get_range(request_headers, size)
+        except RangeNotSatisfiableError:
+            await Response(
+                status_code=416, headers={'content-range': f'bytes */{size}'}
+            )(scope, receive, send)
+            return
+        offset, count = byte_range or (0, size)
+        if byte_range is not None:
+            self.status_code = 206
+            self.headers['content-range'] = f'bytes {offset}-{offset + count - 1}/{size}'
+            self.headers['content-length'] = str(count)
+        await send({
+            'type': 'http.response.start',
+            'status': self.status_code,
+            'headers': self.raw_headers,
+        })
+        await self._send_body(scope, send, offset, count, whole=byte_range is None)
+
+    def _is_not_modified(self, request_headers: Headers) -> bool:
+        if_none_match = request_headers.get('if-none-match')
+        if if_none_match is None:
+            return False
+        etag = self.headers.get('etag')
+        tags = [tag.strip().removeprefix('W/') for tag in if_none_match.split(',')]
+        return '*' in tags or etag in tags
+
+    def _not_modified(self) -> Response:
+        headers = {
+            key: value
+            for key, value in self.headers.items()
+            if key not in ('content-length', 'content-type')
+        }
+        return Response(status_code=304, headers=headers)
+
+    def _get_range(self, request_headers: Headers, size: int) -> tuple[int, int] | None:
+        """Offset and length of the requested range, ``None`` for the whole file."""
+        value = request_headers.get('range')
+        if_range = request_headers.get('if-range')
+        if value is None or (if_range is not None and not self._is_current(if_range)):
+            return None
+        unit, _, spec = value.partition('=')
+        first, separator, last = spec.strip().partition('-')
+        if (
+            unit.strip().lower() != 'bytes'
+            or not separator
+            or not (first.isdigit() or first == '')
+            or not (last.isdigit() or last == '')
+            or first == last == ''
+        ):
+            # Multiple and malformed ranges are ignored, the whole file is sent.
+            return None
+        if first == '':
+            if int(last) == 0:
+                raise RangeNotSatisfiableError
+            start = max(size - int(last), 0)
+            end = size - 1
+        else:
+            start = int(first)
+            end = min(int(last), size - 1) if last else size - 1
+            if last and int(last) < start:
+                return None
+        if start >= size:
+            raise RangeNotSatisfiableError
+        return start, end - start + 1
+
+    def _is_current(self, if_range: str) -> bool:
+        """Whether ``If-Range`` names this file by strong ETag or modification date."""
+        if if_range.startswith('"'):
+            return if_range == self.headers.get('etag')
+        return if_range == self.headers.get('last-modified')
+
+    async def _send_body(
+        self, scope: Scope, send: Send, offset: int, count: int, whole: bool
+    ) -> None:
+        extensions = scope.get('extensions') or {}
+        if scope['method'].upper() == 'HEAD' or count == 0:
+            await send({'type': 'http.response.body', 'body': b'', 'more_body': False})
+        elif ZEROCOPY_SEND in extensions:
+            file = await anyio.to_thread.run_sync(open, self.path, 'rb')
+            try:
+                await send({
+                    'type': ZEROCOPY_SEND,
+                    'file': file,
+                    'offset': offset,
+                    'count': count,
+                    'more_body': False,
+                })
+            finally:
+                await anyio.to_thread.run_sync(file.close)
+        elif PATH_SEND in extensions and whole:
+            await send({'type': PATH_SEND, 'path': str(self.path)})
+        else:
+            async with await anyio.open_file(self.path, mode='rb') as async_file:
+                await async_file.seek(offset)
+                remaining = count
+                while remaining > 0:
+                    chunk = await async_file.read(min(self.chunk_size, remaining))
+                    remaining = remaining - len(chunk) if chunk else 0
+                    await send({
+                        'type': 'http.response.body',
+                        'body': chunk,
+                        'more_body': remaining > 0,
+                    })
@@ -1,4 +1,6 @@
+import os
 from functools import lru_cache
+from typing import Literal
 
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
@@ -15,31 +17,75 @@ class Settings(BaseSettings):
 class DBSettings(Settings):
     db_url: str
     db_echo: bool = False
+    db_pool_size: int = 10
+    db_max_overflow: int = 10
+    db_pool_recycle: int = 30 * 60
+    db_pool_pre_ping: bool = True
+    db_statement_timeout: int | None = None  # milliseconds
+    db_query_cache_size: int = 500
+    db_prepared_statement_cache_size: int = 500
+    db_replica_urls: list[str] = []
+    db_replica_retry: int = 30  # seconds
 
 
 class RedisSettings(Settings):
     redis_url: str
     redis_max_connections: int = 10
+    user_info_codec: Literal['plain', 'json'] = 'plain'
+    user_info_ttl_jitter: float = 0.1
+    user_info_xfetch_beta: float = 1.0
+    user_info_tombstone_ttl: int = 10_000  # milliseconds
+    user_info_l1_enabled: bool = False
+    user_info_l1_size: int = 10_000
+    user_info_l1_ttl: int = 60
+    user_info_lock_enabled: bool = False
+    user_info_lock_ttl: int = 2000  # milliseconds
+    user_info_lock_wait: int = 1000  # milliseconds
+    user_info_lock_poll: int = 50  # milliseconds
 
 
 class TokenSettings(Settings):
     secret_key: str
+    token_cache_size: int = 10_000
+
+
+class HashSettings(Settings):
+    hash_executor: Literal['thread', 'process'] = 'thread'
+    hash_workers: int = os.cpu_count() or 1
+    hash_queue_size: int = 64
+    hash_retry_after: int = 1
+    login_concurrency: int = os.cpu_count() or 1
+    login_queue_size: int = 32
+    signup_concurrency: int = os.cpu_count() or 1
+    signup_queue_size: int = 16
 
 
 class AMQPSettings(Settings):
     amqp_url: str
+    amqp_channel_pool_size: int = 10
 
 
 class StorageSettings(Settings):
+    storage_backend: Literal['s3', 'local'] = 's3'
     storage_path: str
     s3_key: str
     s3_secret: str
     s3_region_name: str
+    s3_max_pool_connections: int = 20
+    s3_connect_timeout: float = 5
+    s3_read_timeout: float = 30
+    avatar_executor: Literal['thread', 'process'] = 'process'
+    avatar_workers: int = os.cpu_count() or 1
+    avatar_queue_size: int = 16
+    avatar_url_ttl: int = 3600
+    avatar_upload_ttl: int = 600
+    avatar_upload_expiry_days: int = 1
 
 
 class MainSettings(BaseSettings):
     db: DBSettings
     token: TokenSettings
+    hashing: HashSettings
     redis: RedisSettings
     amqp: AMQPSettings
     storage: StorageSettings
@@ -50,6 +96,7 @@ def get_settings() -> MainSettings:
     return MainSettings(
         db=DBSettings(),
         token=TokenSettings(),
+        hashing=HashSettings(),
         redis=RedisSettings(),
         amqp=AMQPSettings(),
         storage=StorageSettings(),
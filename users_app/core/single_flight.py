@@ -0,0 +1,30 @@
+import asyncio
+from collections.abc import Awaitable, Callable, Hashable
+from typing import Generic, TypeVar
+
+from core.metrics import metrics
+
+
+T = TypeVar('T')
+
+
+class SingleFlight(Generic[T]):
+    """Runs at most one call per key at a time within a worker.
+
+    Concurrent callers of a key await the call already in flight. The call runs
+    in its own task, so a cancelled caller does not cancel it for the others.
+    """
+
+    def __init__(self, name: str) -> None:
+        self._name = name
+        self._calls: dict[Hashable, asyncio.Task[T]] = {}
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        task = self._calls.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._calls[key] = task
+            task.add_done_callback(lambda _: self._calls.pop(key, None))
+        else:
+            metrics.inc(f'{self._name}.shared')
+        return await asyncio.shield(task)
@@ -0,0 +1,68 @@
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from core.metrics import metrics
+
+
+_timings: ContextVar[dict[str, float] | None] = ContextVar('timings', default=None)
+
+
+@contextmanager
+def timed(name: str) -> Iterator[None]:
+    """Add duration of the block to ``name`` timing of the current request."""
+    timings = _timings.get()
+    if timings is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings[name] = timings.get(name, 0.0) + time.perf_counter() - start
+
+
+class ServerTimingMiddleware:
+    """Pure ASGI middleware reporting request timings.
+
+    Durations collected with ``timed`` are sent in the ``Server-Timing`` header
+    and the total time of each route is observed as ``http.{method} {path}``.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+        timings: dict[str, float] = {}
+        token = _timings.set(timings)
+        start = time.perf_counter()
+
+        async def send_with_timing(message: Message) -> None:
+            if message['type'] == 'http.response.start':
+                timings['total'] = time.perf_counter() - start
+                MutableHeaders(scope=message).append(
+                    'Server-Timing', self._format(timings)
+                )
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _timings.reset(token)
+            route = getattr(scope.get('route'), 'path', 'unmatched')
+            metrics.observe(
+                f'http.{scope["method"]} {route}', time.perf_counter() - start
+            )
+
+    @staticmethod
+    def _format(timings: dict[str, float]) -> str:
+        return ', '.join(
+            f'{name};dur={duration * 1000:.2f}' for name, duration in timings.items()
+        )
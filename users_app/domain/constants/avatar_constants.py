@@ -6,5 +6,28 @@ class AvatarAllowTypes(enum.StrEnum):
     png = 'image/png'
 
 
+class AvatarVariantTypes(enum.StrEnum):
+    webp = 'image/webp'
+    jpeg = 'image/jpeg'
+
+
 AVATAR_BUCKET = 'avatars/'
 AVATAR_MAX_SIZE = 5 * 1024 * 1024
+AVATAR_CHUNK_SIZE = 64 * 1024
+# Room for multipart boundaries and part headers around the file
+AVATAR_MAX_BODY_SIZE = AVATAR_MAX_SIZE + 16 * 1024
+AVATAR_SIGNATURES = {
+    b'\xff\xd8\xff': AvatarAllowTypes.jpeg,
+    b'\x89PNG\r\n\x1a\n': AvatarAllowTypes.png,
+}
+AVATAR_MAX_PIXELS = 40_000_000
+AVATAR_SIZES = (64, 256, 512)
+AVATAR_DEFAULT_SIZE = 256
+AVATAR_VARIANT_KEY = '{base}_{size}.{ext}'
+AVATAR_VARIANT_KEY_PATTERN = r'^[0-9a-f]{64}_[0-9]+\.[a-z]+$'
+AVATAR_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+AVATAR_UPLOAD_ROOT = 'uploads/'
+AVATAR_UPLOAD_PREFIX = AVATAR_UPLOAD_ROOT + '{user_id}/'
+AVATAR_UPLOAD_KEY = AVATAR_UPLOAD_PREFIX + '{token}.{ext}'
+AVATAR_UPLOAD_KEY_PATTERN = r'^uploads/[0-9]+/[0-9a-f]{32}\.[a-z]+$'
+AVATAR_KEY_PATTERN = r'^[0-9a-f]+(_[0-9]+)?\.[a-z]+$'
@@ -3,11 +3,14 @@ import enum
 
 HASH_SCHEMA: str = 'bcrypt'
 LEN_CONFIRMATION_CODE: int = 6
+MAX_BATCH_USERS: int = 300
+USER_INFO_INVALIDATION_CHANNEL: str = 'user_info:invalidate'
 
 
 class CacheName(enum.StrEnum):
-    USER_INFO = 'user_info:{}'
+    USER_INFO = 'user_info:v{}:{}'
     CONFIRMATION_CODE = 'user_code:{}'
+    USER_INFO_LOCK = 'user_info_lock:{}'
 
 
 class CacheTimeout(enum.IntEnum):
@@ -1,6 +1,6 @@
-from typing import Any
+from typing import Annotated, Any
 
-from pydantic import GetCoreSchemaHandler
+from pydantic import AfterValidator, EmailStr, GetCoreSchemaHandler
 from pydantic_core import CoreSchema, core_schema
 
 
@@ -10,3 +10,7 @@ class UIDType(int):
         cls, source_type: Any, handler: GetCoreSchemaHandler
     ) -> CoreSchema:
         return core_schema.no_info_after_validator_function(cls, handler(int))
+
+
+# Emails are unique regardless of case, input is normalized to lower case.
+LowerEmailStr = Annotated[EmailStr, AfterValidator(str.lower)]
@@ -4,3 +4,8 @@ from core.exceptions import AppException
 class InvalidTokenError(AppException):
     status_code = 401
     detail = 'Invalid token'
+
+
+class PermissionDeniedError(AppException):
+    status_code = 403
+    detail = 'Permission denied'
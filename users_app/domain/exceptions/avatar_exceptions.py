@@ -0,0 +1,36 @@
+from core.exceptions import AppException
+
+
+class AvatarTooLargeError(AppException):
+    status_code = 413
+    detail = 'Avatar is too large'
+
+
+class AvatarLengthRequiredError(AppException):
+    status_code = 411
+    detail = 'Avatar upload needs Content-Length'
+
+
+class AvatarTypeNotAllowedError(AppException):
+    status_code = 415
+    detail = 'Avatar type is not allowed'
+
+
+class InvalidAvatarError(AppException):
+    status_code = 400
+    detail = 'Invalid avatar image'
+
+
+class AvatarNotFoundError(AppException):
+    status_code = 404
+    detail = 'Avatar not found'
+
+
+class AvatarUploadNotFoundError(AppException):
+    status_code = 404
+    detail = 'Avatar upload not found'
+
+
+class DirectUploadNotSupportedError(AppException):
+    status_code = 400
+    detail = 'Storage does not support direct avatar uploads'
@@ -1,4 +1,6 @@
-from pydantic import BaseModel, EmailStr
+from pydantic import BaseModel
+
+from domain.custom_types.types_users import LowerEmailStr
 
 
 class AccessTokenSchema(BaseModel):
@@ -23,5 +25,5 @@ class TokenResponseSchema(AccessTokenSchema, RefreshTokenSchema):
 class UserLoginSchema(BaseModel):
     """Schema for user login."""
 
-    email: EmailStr
+    email: LowerEmailStr
     password: str
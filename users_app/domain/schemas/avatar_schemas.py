@@ -2,10 +2,21 @@ from typing import Annotated
 
 from pydantic import BaseModel, Field
 
-from domain.constants.avatar_constants import AVATAR_MAX_SIZE, AvatarAllowTypes
+from domain.constants.avatar_constants import AVATAR_UPLOAD_KEY_PATTERN, AvatarAllowTypes
 
 
-class AvatarSchema(BaseModel):
-    file_bytes: bytes
-    file_size: Annotated[int, Field(le=AVATAR_MAX_SIZE)]
-    mime_type: AvatarAllowTypes
+class AvatarUploadRequestSchema(BaseModel):
+    content_type: AvatarAllowTypes
+
+
+class AvatarUploadSchema(BaseModel):
+    """Form to post the avatar to, ``fields`` go before the file."""
+
+    key: str
+    url: str
+    fields: dict[str, str]
+    expires_in: int
+
+
+class AvatarConfirmSchema(BaseModel):
+    key: Annotated[str, Field(pattern=AVATAR_UPLOAD_KEY_PATTERN)]
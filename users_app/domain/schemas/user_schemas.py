@@ -3,9 +3,15 @@ from typing import Annotated, Self
 from pydantic import BaseModel, ConfigDict, EmailStr, Field, model_validator
 
 from core.settings import settings
-from domain.constants.avatar_constants import AVATAR_BUCKET
-from domain.constants.user_constants import MaxLength
-from domain.custom_types.types_users import UIDType
+from domain.constants.avatar_constants import (
+    AVATAR_BUCKET,
+    AVATAR_DEFAULT_SIZE,
+    AVATAR_SIZES,
+    AVATAR_VARIANT_KEY,
+    AvatarVariantTypes,
+)
+from domain.constants.user_constants import MAX_BATCH_USERS, MaxLength
+from domain.custom_types.types_users import LowerEmailStr, UIDType
 from domain.schemas.auth_schemas import UserLoginSchema
 
 
@@ -24,14 +30,34 @@ class ProfileSchema(BaseModel):
 
 class ProfileInfoSchema(ProfileSchema):
     avatar: str | None = None
+    avatar_srcset: dict[AvatarVariantTypes, str] | None = None
 
     @property
     def prefix(self) -> str:
         return settings.storage.storage_path + AVATAR_BUCKET
 
     def add_path_avatar(self) -> None:
-        if self.avatar is not None:
+        """Turn avatar key into URLs, variants are listed per type as ``srcset``."""
+        if self.avatar is None:
+            return
+        if '.' in self.avatar:
+            # Original image uploaded before variants were generated.
             self.avatar = self.prefix + self.avatar
+            return
+        base = self.avatar
+        self.avatar = self._variant_url(base, AVATAR_DEFAULT_SIZE, AvatarVariantTypes.jpeg)
+        self.avatar_srcset = {
+            mime_type: ', '.join(
+                f'{self._variant_url(base, size, mime_type)} {size}w'
+                for size in AVATAR_SIZES
+            )
+            for mime_type in AvatarVariantTypes
+        }
+
+    def _variant_url(self, base: str, size: int, mime_type: AvatarVariantTypes) -> str:
+        return self.prefix + AVATAR_VARIANT_KEY.format(
+            base=base, size=size, ext=mime_type.name
+        )
 
     def remove_path_avatar(self) -> None:
         if self.avatar is not None:
@@ -59,7 +85,7 @@ class UserPasswordsSchema(BaseModel):
 
 class UserRegistrationInputSchema(UserPasswordsSchema):
     """Schema for user registration."""
-    email: EmailStr
+    email: LowerEmailStr
     profile: ProfileSchema | None = None
 
 
@@ -69,6 +95,10 @@ class UserInfoSchema(BaseModel):
     profile: ProfileInfoSchema
 
 
+class UserIdsSchema(BaseModel):
+    user_ids: Annotated[list[UIDType], Field(min_length=1, max_length=MAX_BATCH_USERS)]
+
+
 class UserInfoSchemaActive(UserInfoSchema):
     is_active: bool
 
@@ -87,7 +117,7 @@ class ProfileUpdateSchema(ProfileSchema):
 
 
 class EmailSchema(BaseModel):
-    email: EmailStr
+    email: LowerEmailStr
 
 
 class ConfirmationUserSchema(EmailSchema):
@@ -4,15 +4,24 @@ from typing import Literal
 from jose import jwt
 from jose.exceptions import JWTError
 
+from core.dependency import impl
+from core.lru import LRUCache
 from core.settings import settings
 from domain.constants.auth_constants import TokenEnum
 from domain.custom_types.types_users import UIDType
-from domain.exceptions.auth_exceptions import InvalidTokenError
+from domain.exceptions.auth_exceptions import InvalidTokenError, PermissionDeniedError
 from domain.schemas.auth_schemas import (
     AccessTokenSchema,
     RefreshTokenSchema,
     TokenResponseSchema,
 )
+from repositories.repository import IUserRepository
+
+
+# token -> (user_id, token_type, exp) of tokens with a verified signature
+_verified_tokens: LRUCache[str, tuple[UIDType, str, int]] = LRUCache(
+    'jwt.verified_tokens', max_size=settings.token.token_cache_size
+)
 
 
 class JWTService:
@@ -90,18 +99,39 @@ class JWTService:
     @staticmethod
     def _get_user_id_from_token(token: str, expected_type: TokenEnum) -> UIDType:
         """Get user id from token."""
+        claims = _verified_tokens.get(token)
+        if claims is None:
+            claims = JWTService._decode_token(token)
+            _verified_tokens.set(token, claims, expires_at=claims[2])
+        user_id, token_type, _ = claims
+        if token_type == expected_type.value:
+            return user_id
+        raise InvalidTokenError
+
+    @staticmethod
+    def _decode_token(token: str) -> tuple[UIDType, str, int]:
+        """Verify token signature and expiry returning its claims.
+
+        Tokens without ``exp`` are invalid, they would never expire in the cache.
+        """
         try:
             payload: dict[str, str | int | UIDType] = jwt.decode(
                 token=token,
                 key=settings.token.secret_key,
                 algorithms=TokenEnum.ALGORITHM.value,
+                options={'require_exp': True},
             )
-            user_id = payload.get('user_id')
-            if payload.get('token_type') == expected_type.value:
-                return user_id
-            raise InvalidTokenError
         except JWTError:
             raise InvalidTokenError
+        user_id, token_type = payload.get('user_id'), payload.get('token_type')
+        expires_at = payload.get('exp')
+        if (
+            not isinstance(user_id, int)
+            or not isinstance(token_type, str)
+            or not isinstance(expires_at, int)
+        ):
+            raise InvalidTokenError
+        return UIDType(user_id), token_type, expires_at
 
 
 class PermissionService:
@@ -111,3 +141,15 @@ class PermissionService:
     ) -> UIDType:
         """Service to get current user id by Authorization header."""
         return JWTService.get_user_id_from_access_token(token)
+
+
+class AdminPermissionService:
+    def __init__(self) -> None:
+        self._repository: IUserRepository = impl.container.resolve(IUserRepository)
+
+    async def get_admin_id(self, token: str) -> UIDType:
+        """Get current user id, users other than staff and super users are denied."""
+        user_id = PermissionService.get_current_user_id(token)
+        if not await self._repository.is_admin(user_id):
+            raise PermissionDeniedError
+        return user_id
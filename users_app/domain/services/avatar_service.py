@@ -1,13 +1,102 @@
+import asyncio
 import hashlib
-import mimetypes
+import io
+import re
+import uuid
+import warnings
+from collections.abc import AsyncIterable, AsyncIterator
+from functools import partial
+
+import aiofiles.tempfile
+from PIL import Image, ImageOps
 
 from core.dependency import impl
-from domain.constants.avatar_constants import AvatarAllowTypes
+from core.executor import BoundedExecutor
+from core.settings import settings
+from domain.constants.avatar_constants import (
+    AVATAR_MAX_PIXELS,
+    AVATAR_MAX_SIZE,
+    AVATAR_SIGNATURES,
+    AVATAR_SIZES,
+    AVATAR_UPLOAD_KEY,
+    AVATAR_UPLOAD_PREFIX,
+    AVATAR_VARIANT_KEY,
+    AVATAR_VARIANT_KEY_PATTERN,
+    AvatarAllowTypes,
+    AvatarVariantTypes,
+)
 from domain.custom_types.types_users import UIDType
-from domain.schemas.avatar_schemas import AvatarSchema
+from domain.exceptions.avatar_exceptions import (
+    AvatarNotFoundError,
+    AvatarTooLargeError,
+    AvatarTypeNotAllowedError,
+    AvatarUploadNotFoundError,
+    DirectUploadNotSupportedError,
+    InvalidAvatarError,
+)
+from domain.schemas.avatar_schemas import AvatarUploadSchema
 from domain.schemas.common_schemas import SuccessResponse
 from repositories.repository import IUserRepository
-from repositories.storage.base import IStorage
+from repositories.storage.base import AvatarLocation, IStorage
+
+
+SIGNATURE_SIZE = max(len(signature) for signature in AVATAR_SIGNATURES)
+
+avatar_executor = BoundedExecutor(
+    'avatar',
+    kind=settings.storage.avatar_executor,
+    workers=settings.storage.avatar_workers,
+    queue_size=settings.storage.avatar_queue_size,
+)
+
+AvatarVariants = list[tuple[int, AvatarVariantTypes, bytes]]
+
+
+class AvatarImageService:
+    @staticmethod
+    def make_variants(path: str) -> AvatarVariants:
+        """Decode image and encode square variants of every size without metadata."""
+        largest = max(AVATAR_SIZES)
+        try:
+            with warnings.catch_warnings():
+                warnings.simplefilter('error', Image.DecompressionBombWarning)
+                with Image.open(path) as image:
+                    # The size is read from the header, pixels are not decoded yet.
+                    if image.width * image.height > AVATAR_MAX_PIXELS:
+                        raise ValueError('Image has too many pixels')
+                    image.draft('RGB', (largest, largest))
+                    transposed = ImageOps.exif_transpose(image) or image
+                    square = ImageOps.fit(
+                        transposed.convert('RGBA'),
+                        (largest, largest),
+                        Image.Resampling.LANCZOS,
+                    )
+        except (
+            OSError, SyntaxError, Image.DecompressionBombError, Image.DecompressionBombWarning
+        ) as error:
+            raise ValueError(f'Invalid avatar image: {error}') from None
+        variants = []
+        for size in sorted(AVATAR_SIZES, reverse=True):
+            if square.width != size:
+                square = square.resize((size, size), Image.Resampling.LANCZOS)
+            flat = Image.new('RGB', square.size, 'white')
+            flat.paste(square, mask=square.getchannel('A'))
+            for mime_type in AvatarVariantTypes:
+                buffer = io.BytesIO()
+                if mime_type is AvatarVariantTypes.webp:
+                    square.save(buffer, 'WEBP', quality=80, method=4)
+                else:
+                    flat.save(buffer, 'JPEG', quality=85, optimize=True, progressive=True)
+                variants.append((size, mime_type, buffer.getvalue()))
+        return variants
+
+    @classmethod
+    async def make_variants_async(cls, path: str) -> AvatarVariants:
+        """Make variants in the avatar executor."""
+        try:
+            return await avatar_executor.run(cls.make_variants, path)
+        except ValueError:
+            raise InvalidAvatarError from None
 
 
 class UserAvatarSetService:
@@ -15,16 +104,169 @@ class UserAvatarSetService:
         self._storage_adapter: IStorage = impl.container.resolve(IStorage)
         self._repository: IUserRepository = impl.container.resolve(IUserRepository)
 
-    async def set(self, user_id: UIDType, schema: AvatarSchema) -> SuccessResponse:
-        filename = self._get_hashed_filename(user_id, schema.mime_type)
-        await self._storage_adapter.upload_avatar(
-            schema.file_bytes,
-            filename,
-        )
-        await self._repository.update_user_avatar(user_id, filename)
+    async def set(
+        self,
+        user_id: UIDType,
+        chunks: AsyncIterable[bytes],
+        content_length: int | None = None,
+    ) -> SuccessResponse:
+        """Stream avatar chunks to a temporary file and store its variants.
+
+        Uploads are rejected by the declared length before reading and by the
+        running size while streaming, the type is sniffed from the first bytes.
+        Variants are keyed by the hash of the upload, so content stored before
+        is not processed again and the previous avatar is released once unused.
+        Images are processed and uploaded before the profile is updated, so the
+        transaction and the avatar lock are held only for the update.
+        """
+        if content_length is not None and content_length > AVATAR_MAX_SIZE:
+            raise AvatarTooLargeError
+        stream = self._limit_size(chunks)
+        head = await self._read_head(stream)
+        self._sniff_type(head)
+        digest = hashlib.sha256()
+        async with aiofiles.tempfile.NamedTemporaryFile('wb') as file:
+            async for chunk in self._prepend(head, stream):
+                digest.update(chunk)
+                await file.write(chunk)
+            await file.flush()
+            base = digest.hexdigest()
+            variants = None
+            if not await self._is_stored(base):
+                variants = await AvatarImageService.make_variants_async(str(file.name))
+                await self._upload(base, variants)
+            previous = await self._repository.update_user_avatar(user_id, base)
+            # A release of the same content may have deleted the variants before
+            # the avatar lock was taken, releases wait for the lock from now on.
+            if previous != base and not await self._is_stored(base):
+                if variants is None:
+                    variants = await AvatarImageService.make_variants_async(
+                        str(file.name)
+                    )
+                await self._upload(base, variants)
+        await self._release(previous, base)
         return SuccessResponse(success=True)
 
-    def _get_hashed_filename(self, user_id: UIDType, mime_type: AvatarAllowTypes) -> str:
-        hashed_name = hashlib.sha1(str(user_id).encode()).hexdigest()
-        ext = mimetypes.guess_extension(mime_type, strict=True)
-        return ''.join([hashed_name, ext])
+    async def create_upload(
+        self, user_id: UIDType, content_type: AvatarAllowTypes
+    ) -> AvatarUploadSchema:
+        """Presign direct upload of the avatar to the storage under a new key."""
+        key = AVATAR_UPLOAD_KEY.format(
+            user_id=user_id, token=uuid.uuid4().hex, ext=content_type.name
+        )
+        expires_in = settings.storage.avatar_upload_ttl
+        try:
+            upload = await self._storage_adapter.create_avatar_upload(
+                key, content_type, AVATAR_MAX_SIZE, expires_in
+            )
+        except NotImplementedError:
+            raise DirectUploadNotSupportedError from None
+        return AvatarUploadSchema(
+            key=key, url=upload.url, fields=upload.fields, expires_in=expires_in
+        )
+
+    async def confirm_upload(self, user_id: UIDType, key: str) -> SuccessResponse:
+        """Set directly uploaded avatar, processed like an avatar sent to the API.
+
+        The upload is read from the storage into variants keyed by its content
+        hash and deleted afterwards, valid or not. Uploads that are never
+        confirmed are deleted by the storage, see ``S3Storage.expire_uploads``.
+        """
+        if not key.startswith(AVATAR_UPLOAD_PREFIX.format(user_id=user_id)):
+            raise AvatarUploadNotFoundError
+        stored = await self._storage_adapter.get_avatar_object(key)
+        if stored is None:
+            raise AvatarUploadNotFoundError
+        try:
+            return await self.set(
+                user_id, self._storage_adapter.read_avatar(key), stored.size
+            )
+        except FileNotFoundError:
+            raise AvatarUploadNotFoundError from None
+        finally:
+            await self._storage_adapter.delete_avatars([key])
+
+    async def _release(self, previous: str | None, current: str) -> None:
+        """Delete the replaced avatar once no profile refers to it."""
+        if previous is None or previous == current:
+            return
+        await self._repository.release_avatar(
+            previous,
+            partial(self._storage_adapter.delete_avatars, self._get_keys(previous)),
+        )
+
+    async def _is_stored(self, base: str) -> bool:
+        keys = self._get_keys(base)
+        return all(await asyncio.gather(*map(self._storage_adapter.avatar_exists, keys)))
+
+    async def _upload(self, base: str, variants: AvatarVariants) -> None:
+        await asyncio.gather(*(
+            self._storage_adapter.upload_avatar(
+                data,
+                AVATAR_VARIANT_KEY.format(base=base, size=size, ext=mime_type.name),
+                mime_type,
+            )
+            for size, mime_type, data in variants
+        ))
+
+    @staticmethod
+    def _get_keys(avatar: str) -> list[str]:
+        """Storage keys of the avatar, legacy avatars are a single original."""
+        if '.' in avatar:
+            return [avatar]
+        return [
+            AVATAR_VARIANT_KEY.format(base=avatar, size=size, ext=mime_type.name)
+            for size in AVATAR_SIZES
+            for mime_type in AvatarVariantTypes
+        ]
+
+    @staticmethod
+    async def _limit_size(chunks: AsyncIterable[bytes]) -> AsyncIterator[bytes]:
+        size = 0
+        async for chunk in chunks:
+            size += len(chunk)
+            if size > AVATAR_MAX_SIZE:
+                raise AvatarTooLargeError
+            yield chunk
+
+    @staticmethod
+    async def _read_head(stream: AsyncIterator[bytes]) -> bytes:
+        """Read chunks until the longest signature fits."""
+        head = b''
+        async for chunk in stream:
+            head += chunk
+            if len(head) >= SIGNATURE_SIZE:
+                break
+        return head
+
+    @staticmethod
+    def _sniff_type(head: bytes) -> AvatarAllowTypes:
+        for signature, mime_type in AVATAR_SIGNATURES.items():
+            if head.startswith(signature):
+                return mime_type
+        raise AvatarTypeNotAllowedError
+
+    @staticmethod
+    async def _prepend(head: bytes, stream: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+        yield head
+        async for chunk in stream:
+            yield chunk
+
+
+class AvatarGetService:
+    def __init__(self) -> None:
+        self._storage_adapter: IStorage = impl.container.resolve(IStorage)
+
+    async def locate(self, key: str) -> AvatarLocation:
+        location = await self._storage_adapter.locate_avatar(key)
+        if location is None:
+            raise AvatarNotFoundError
+        return location
+
+    @staticmethod
+    def is_immutable(key: str) -> bool:
+        """Content hash variants get new keys for new content.
+
+        Legacy keys derived from the user id are overwritten in place.
+        """
+        return re.match(AVATAR_VARIANT_KEY_PATTERN, key) is not None
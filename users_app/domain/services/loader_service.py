@@ -0,0 +1,60 @@
+import asyncio
+from collections.abc import Sequence
+
+from core.dependency import impl
+from domain.custom_types.types_users import UIDType
+from domain.schemas.user_schemas import UserInfoSchema
+from repositories.repository import IUserRepository
+
+
+class UserInfoLoader:
+    """Coalesces user info lookups made within one event loop tick.
+
+    All ids requested before the loop gets to the scheduled dispatch are loaded
+    with a single ``get_user_infos_by_ids`` call, concurrent requests of the same
+    id share one future. Loaded schemas are shared between callers and must be
+    copied before being changed.
+    """
+
+    def __init__(self) -> None:
+        self._pending: dict[UIDType, asyncio.Future[UserInfoSchema | None]] = {}
+        self._tasks: set[asyncio.Task[None]] = set()
+        self._scheduled = False
+
+    async def load_many(self, user_ids: Sequence[UIDType]) -> list[UserInfoSchema | None]:
+        """Load user infos in order of ids, ``None`` for missing users."""
+        loop = asyncio.get_running_loop()
+        futures = []
+        for user_id in user_ids:
+            future = self._pending.get(user_id)
+            if future is None:
+                future = self._pending[user_id] = loop.create_future()
+            futures.append(future)
+        if not self._scheduled:
+            self._scheduled = True
+            loop.call_soon(self._dispatch)
+        return await asyncio.gather(*(asyncio.shield(future) for future in futures))
+
+    def _dispatch(self) -> None:
+        batch, self._pending = self._pending, {}
+        self._scheduled = False
+        task = asyncio.create_task(self._load(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    @staticmethod
+    async def _load(batch: dict[UIDType, asyncio.Future[UserInfoSchema | None]]) -> None:
+        repository: IUserRepository = impl.container.resolve(IUserRepository)
+        try:
+            schemas = await repository.get_user_infos_by_ids(list(batch))
+        except Exception as error:
+            for future in batch.values():
+                if not future.done():
+                    future.set_exception(error)
+            return
+        for user_id, future in batch.items():
+            if not future.done():
+                future.set_result(schemas.get(user_id))
+
+
+user_info_loader = UserInfoLoader()
@@ -1,8 +1,12 @@
 import asyncio
+from collections.abc import Sequence
 
 import bcrypt
 
+from core.admission import AdmissionLimiter
 from core.dependency import impl
+from core.executor import BoundedExecutor
+from core.settings import settings
 from domain.custom_types.types_users import UIDType
 from domain.exceptions.user_exceptions import (
     InvalidConfirmationCodeError,
@@ -27,10 +31,31 @@ from domain.schemas.user_schemas import (
 )
 from domain.services.auth_service import JWTService
 from domain.services.common_service import ConfirmationCodeService
+from domain.services.loader_service import user_info_loader
 from domain.services.notify_service import CreateCodeNotifyUserService
 from repositories.repository import IUserRepository
 
 
+hash_executor = BoundedExecutor(
+    'hash',
+    kind=settings.hashing.hash_executor,
+    workers=settings.hashing.hash_workers,
+    queue_size=settings.hashing.hash_queue_size,
+)
+login_limiter = AdmissionLimiter(
+    'auth.login',
+    limit=settings.hashing.login_concurrency,
+    max_queue=settings.hashing.login_queue_size,
+    retry_after=settings.hashing.hash_retry_after,
+)
+signup_limiter = AdmissionLimiter(
+    'auth.signup',
+    limit=settings.hashing.signup_concurrency,
+    max_queue=settings.hashing.signup_queue_size,
+    retry_after=settings.hashing.hash_retry_after,
+)
+
+
 class HashService:
     @staticmethod
     def hash_password(password: str) -> str:
@@ -45,6 +70,16 @@ class HashService:
         """Verify password."""
         return bcrypt.checkpw(password.encode('utf-8'), hashed_password.encode('utf-8'))
 
+    @classmethod
+    async def hash_password_async(cls, password: str) -> str:
+        """Hash password in the hash executor."""
+        return await hash_executor.run(cls.hash_password, password)
+
+    @classmethod
+    async def verify_password_async(cls, password: str, hashed_password: str) -> bool:
+        """Verify password in the hash executor."""
+        return await hash_executor.run(cls.verify_password, password, hashed_password)
+
 
 class UserService:
     def __init__(
@@ -54,7 +89,8 @@ class UserService:
 
     async def create(self, user: UserRegistrationInputSchema) -> UserInfoSchema:
         """Create new user in database."""
-        user.password = HashService.hash_password(user.password)
+        async with signup_limiter:
+            user.password = await HashService.hash_password_async(user.password)
         user_schema = await self._repository.create(user)
         if not user_schema:
             raise UserAlreadyExistError
@@ -71,7 +107,11 @@ class UserService:
             raise UserNotFoundError
         if not user.is_active:
             raise UserNotActivatedError
-        if not HashService.verify_password(user_login.password, user.password):
+        async with login_limiter:
+            verified = await HashService.verify_password_async(
+                user_login.password, user.password
+            )
+        if not verified:
             raise InvalidPasswordError
         return JWTService.create_tokens(user.user_id)
 
@@ -83,6 +123,18 @@ class UserService:
         user_schema.profile.add_path_avatar()
         return user_schema
 
+    async def get_user_infos_by_ids(
+        self, user_ids: Sequence[UIDType]
+    ) -> list[UserInfoSchema]:
+        """Get info of found users in order of ids."""
+        schemas = []
+        for schema in await user_info_loader.load_many(user_ids):
+            if schema is not None:
+                schema = schema.model_copy(deep=True)
+                schema.profile.add_path_avatar()
+                schemas.append(schema)
+        return schemas
+
     async def update_profile(
         self, user_id: UIDType, profile: ProfileUpdateSchema
     ) -> ProfileSchema:
@@ -131,6 +183,7 @@ class UserService:
         code = await ConfirmationCodeService().verify_code(user_schema.user_id, schema.code)
         if not code:
             raise InvalidConfirmationCodeError
-        hashed_password = HashService.hash_password(schema.password)
+        async with signup_limiter:
+            hashed_password = await HashService.hash_password_async(schema.password)
         await self._repository.change_password(user_schema.user_id, hashed_password)
         return SuccessResponse(success=True)
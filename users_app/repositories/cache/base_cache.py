@@ -1,17 +1,87 @@
+import math
+import random
+import time
 from abc import ABC, abstractmethod
+from collections.abc import Iterable, Mapping
+from typing import NamedTuple
 
 from domain.schemas.user_schemas import UserInfoSchema
 
 
+class CacheEntry(NamedTuple):
+    """Cached schema with its expiry time, recompute time in seconds and version."""
+
+    value: UserInfoSchema
+    expires_at: float | None = None
+    delta: float = 0.0
+    version: int = 0
+
+    def should_refresh(self, beta: float = 1.0) -> bool:
+        """Whether to recompute value before it expires (XFetch).
+
+        Probability grows as expiry gets closer and as the value is slower
+        to recompute, so hot entries are refreshed before they expire.
+        """
+        if self.expires_at is None or not self.delta:
+            return False
+        gap = -self.delta * beta * math.log(1 - random.random())
+        return time.time() + gap >= self.expires_at
+
+
 class IUserBaseCache(ABC):
     @abstractmethod
     async def get(self, key: str) -> UserInfoSchema | None:
         raise NotImplementedError
 
     @abstractmethod
-    async def set(self, key: str, schema: UserInfoSchema) -> None:
+    async def set(
+        self,
+        key: str,
+        schema: UserInfoSchema,
+        delta: float = 0.0,
+        version: int | None = None,
+    ) -> None:
+        """Cache schema which took ``delta`` seconds to load.
+
+        The schema is written only if the cached entry still has ``version``,
+        or does not exist for ``None``, so data read before a concurrent
+        ``update_profile`` never overwrites it.
+        """
         raise NotImplementedError
 
+    @abstractmethod
+    async def update_profile(self, key: str, profile: Mapping[str, str]) -> None:
+        """Atomically change profile fields of a cached schema.
+
+        Missing entries are not created, the change only blocks cache fills
+        until the entry has been loaded again.
+        """
+        raise NotImplementedError
+
+    async def get_entry(self, key: str) -> CacheEntry | None:
+        """Get cached schema with its expiry details."""
+        schema = await self.get(key)
+        return CacheEntry(schema) if schema else None
+
+    @abstractmethod
+    async def get_many(self, keys: Iterable[str]) -> dict[str, UserInfoSchema]:
+        """Get cached schemas of the keys, missing keys are omitted."""
+        raise NotImplementedError
+
+    @abstractmethod
+    async def set_many(
+        self, schemas: Mapping[str, UserInfoSchema], delta: float = 0.0
+    ) -> None:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def delete_many(self, keys: Iterable[str]) -> None:
+        raise NotImplementedError
+
+    async def invalidate(self, key: str) -> None:
+        """Notify other workers that the user was written."""
+        return None
+
 
 class IUserCodeCache(ABC):
     @abstractmethod
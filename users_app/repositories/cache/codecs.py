@@ -0,0 +1,162 @@
+import json
+from abc import ABC, abstractmethod
+from collections.abc import Mapping, Sequence
+from typing import Any
+
+from domain.custom_types.types_users import UIDType
+from domain.schemas.user_schemas import ProfileInfoSchema, UserInfoSchema
+from repositories.cache.base_cache import CacheEntry
+
+
+class IUserInfoCodec(ABC):
+    """Serializer of user values stored in cached user info hash fields.
+
+    The codec ``version`` is a part of the key, hashes written by another codec
+    are not read and simply expire, so switching codecs needs no flush. Versions
+    are unique across codecs: bump ``version`` whenever the encoding or the hash
+    fields change.
+    """
+
+    version: int
+
+    @abstractmethod
+    def dump(self, value: str) -> bytes:
+        raise NotImplementedError
+
+    @abstractmethod
+    def build(
+        self,
+        user_id: bytes,
+        email: bytes,
+        first_name: bytes | None,
+        last_name: bytes | None,
+        avatar: bytes | None,
+    ) -> UserInfoSchema | None:
+        """Schema of field values, ``None`` for values which can not be decoded."""
+        raise NotImplementedError
+
+
+class PlainUserInfoCodec(IUserInfoCodec):
+    """Values as plain strings.
+
+    Values were validated before they have been cached, so decoding builds
+    schemas with ``model_construct`` without validating them again.
+    """
+
+    version = 2
+
+    def dump(self, value: str) -> bytes:
+        return value.encode()
+
+    def build(
+        self,
+        user_id: bytes,
+        email: bytes,
+        first_name: bytes | None,
+        last_name: bytes | None,
+        avatar: bytes | None,
+    ) -> UserInfoSchema:
+        return UserInfoSchema.model_construct(
+            user_id=UIDType(user_id),
+            email=email.decode(),
+            profile=ProfileInfoSchema.model_construct(
+                first_name=first_name.decode() if first_name is not None else None,
+                last_name=last_name.decode() if last_name is not None else None,
+                avatar=avatar.decode() if avatar is not None else None,
+            ),
+        )
+
+
+class JsonUserInfoCodec(IUserInfoCodec):
+    """Values as JSON strings, schemas validated on decode."""
+
+    version = 3
+
+    def dump(self, value: str) -> bytes:
+        return json.dumps(value).encode()
+
+    def build(
+        self,
+        user_id: bytes,
+        email: bytes,
+        first_name: bytes | None,
+        last_name: bytes | None,
+        avatar: bytes | None,
+    ) -> UserInfoSchema | None:
+        try:
+            return UserInfoSchema.model_validate({
+                'user_id': json.loads(user_id),
+                'email': json.loads(email),
+                'profile': {
+                    'first_name': self._load(first_name),
+                    'last_name': self._load(last_name),
+                    'avatar': self._load(avatar),
+                },
+            })
+        except ValueError:
+            return None
+
+    @staticmethod
+    def _load(value: bytes | None) -> Any:
+        return json.loads(value) if value is not None else None
+
+
+class UserInfoHashCodec:
+    """Maps cached user info entries to Redis hash fields.
+
+    Every value is a separate field, so profile fields can be changed in place,
+    ``None`` values are left out. User values are serialized by ``values``,
+    field ``ver`` counts in-place changes of the hash and is kept as an integer
+    for ``HINCRBY`` like the expiry details.
+    """
+
+    fields = ('ver', 'uid', 'email', 'fn', 'ln', 'av', 'exp', 'delta')
+    profile_fields = {'first_name': 'fn', 'last_name': 'ln', 'avatar': 'av'}
+
+    def __init__(self, values: IUserInfoCodec) -> None:
+        self._values = values
+
+    @property
+    def version(self) -> int:
+        return self._values.version
+
+    def encode(self, entry: CacheEntry) -> dict[str, bytes | str]:
+        schema = entry.value
+        fields: dict[str, bytes | str] = {
+            'uid': self._values.dump(str(schema.user_id)),
+            'email': self._values.dump(schema.email),
+            'exp': repr(entry.expires_at or 0.0),
+            'delta': repr(entry.delta),
+        }
+        fields.update(
+            self.encode_profile(schema.profile.model_dump(include=set(self.profile_fields)))
+        )
+        return fields
+
+    def encode_profile(self, profile: Mapping[str, str | None]) -> dict[str, bytes]:
+        return {
+            self.profile_fields[name]: self._values.dump(value)
+            for name, value in profile.items()
+            if value is not None
+        }
+
+    def decode(self, values: Sequence[bytes | None]) -> CacheEntry | None:
+        """Decode values of ``fields``, a hash without user is a miss."""
+        version, user_id, email, first_name, last_name, avatar, expires_at, delta = values
+        if user_id is None or email is None:
+            return None
+        schema = self._values.build(user_id, email, first_name, last_name, avatar)
+        if schema is None:
+            return None
+        return CacheEntry(
+            schema,
+            float(expires_at or 0) or None,
+            float(delta or 0),
+            int(version or 0),
+        )
+
+
+USER_INFO_CODECS: dict[str, type[IUserInfoCodec]] = {
+    'plain': PlainUserInfoCodec,
+    'json': JsonUserInfoCodec,
+}
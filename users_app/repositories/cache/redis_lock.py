@@ -0,0 +1,29 @@
+import uuid
+
+from repositories.cache.base_redis import RedisBaseCache
+
+
+# deletes the lock only if it is still held by the same owner
+RELEASE_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+
+class RedisLock(RedisBaseCache):
+    """Lock shared by all workers, expiring by itself if its owner dies."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._release = self._connect.register_script(RELEASE_SCRIPT)
+
+    async def acquire(self, name: str, ttl: int) -> str | None:
+        """Acquire lock for ``ttl`` milliseconds returning its token if acquired."""
+        token = uuid.uuid4().hex
+        acquired = await self._connect.set(name, token, nx=True, px=ttl)
+        return token if acquired else None
+
+    async def release(self, name: str, token: str) -> None:
+        await self._release(keys=[name], args=[token])
@@ -1,34 +1,170 @@
+import builtins
+import random
+import time
+from collections.abc import Iterable, Mapping
+from itertools import chain
+
+from core.settings import settings
+from core.timing import timed
 from domain.constants.user_constants import CacheName, CacheTimeout
 from domain.schemas.user_schemas import UserInfoSchema
-from repositories.cache.base_cache import IUserBaseCache, IUserCodeCache
+from repositories.cache.base_cache import CacheEntry, IUserBaseCache, IUserCodeCache
 from repositories.cache.base_redis import RedisBaseCache
+from repositories.cache.codecs import USER_INFO_CODECS, UserInfoHashCodec
+
+
+# KEYS[1] user info hash
+# ARGV[1] expected version, empty for a missing hash, ARGV[2] ttl in milliseconds,
+# ARGV[3...] fields and values
+FILL_SCRIPT = """
+local version = redis.call('HGET', KEYS[1], 'ver')
+if (version or '') ~= ARGV[1] then
+    return 0
+end
+redis.call('DEL', KEYS[1])
+redis.call('HSET', KEYS[1], 'ver', version or '0', unpack(ARGV, 3))
+redis.call('PEXPIRE', KEYS[1], ARGV[2])
+return 1
+"""
+
+# KEYS[1] user info hash
+# ARGV[1] ttl of a tombstone in milliseconds, ARGV[2...] fields and values
+UPDATE_SCRIPT = """
+local version = redis.call('HINCRBY', KEYS[1], 'ver', 1)
+if redis.call('HEXISTS', KEYS[1], 'uid') == 1 then
+    redis.call('HSET', KEYS[1], unpack(ARGV, 2))
+else
+    redis.call('PEXPIRE', KEYS[1], ARGV[1])
+end
+return version
+"""
 
 
 class UserRedisCache(IUserBaseCache, RedisBaseCache):
-    async def get(self, key: str) -> UserInfoSchema | None:
-        json_schema = await self._connect.get(
-            name=CacheName.USER_INFO.value.format(str(key)),
+    """User info stored in Redis hashes.
+
+    Hashes are filled and changed by Lua scripts in one round trip each.
+    ``update_profile`` bumps the hash version and ``set`` writes only over the
+    version it expects, so a fill with data read before an update is dropped.
+    An update of a missing hash leaves a short-lived tombstone with the bumped
+    version, which blocks fills until it expires.
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._codec = UserInfoHashCodec(
+            USER_INFO_CODECS[settings.redis.user_info_codec]()
         )
-        return UserInfoSchema.model_validate_json(json_schema) if json_schema else None
+        self._fill = self._connect.register_script(FILL_SCRIPT)
+        self._update = self._connect.register_script(UPDATE_SCRIPT)
+
+    def _name(self, key: str) -> str:
+        return CacheName.USER_INFO.value.format(self._codec.version, key)
+
+    @staticmethod
+    def new_entry(
+        schema: UserInfoSchema, delta: float = 0.0, version: int | None = None
+    ) -> CacheEntry:
+        """Entry expiring after ``USER_INFO`` timeout shortened by a random jitter."""
+        jitter = settings.redis.user_info_ttl_jitter * random.random()
+        ttl = CacheTimeout.USER_INFO.value * (1 - jitter)
+        return CacheEntry(schema, time.time() + ttl, delta, version or 0)
+
+    async def get(self, key: str) -> UserInfoSchema | None:
+        entry = await self.get_entry(key)
+        return entry.value if entry else None
+
+    async def get_entry(self, key: str) -> CacheEntry | None:
+        with timed('cache'):
+            values = await self._connect.hmget(self._name(key), self._codec.fields)
+        return self._codec.decode(values)
+
+    async def set(
+        self,
+        key: str,
+        schema: UserInfoSchema,
+        delta: float = 0.0,
+        version: int | None = None,
+    ) -> None:
+        await self.set_entries({key: self.new_entry(schema, delta, version)}, version)
+
+    async def update_profile(self, key: str, profile: Mapping[str, str]) -> None:
+        fields = self._codec.encode_profile(profile)
+        if not fields:
+            return
+        with timed('cache'):
+            await self._update(
+                keys=[self._name(key)],
+                args=[settings.redis.user_info_tombstone_ttl, *chain(*fields.items())],
+            )
+
+    async def get_many(self, keys: Iterable[str]) -> dict[str, UserInfoSchema]:
+        entries = await self.get_entries(keys)
+        return {key: entry.value for key, entry in entries.items()}
 
-    async def set(self, key: str, schema: UserInfoSchema) -> None:
-        await self._connect.set(
-            name=CacheName.USER_INFO.value.format(key),
-            value=schema.model_dump_json(),
-            ex=CacheTimeout.USER_INFO.value,
+    async def get_entries(self, keys: Iterable[str]) -> dict[str, CacheEntry]:
+        keys = list(keys)
+        if not keys:
+            return {}
+        with timed('cache'):
+            async with self._connect.pipeline(transaction=False) as pipe:
+                for key in keys:
+                    pipe.hmget(self._name(key), self._codec.fields)
+                values = await pipe.execute()
+        entries = {}
+        for key, fields in zip(keys, values):
+            entry = self._codec.decode(fields)
+            if entry is not None:
+                entries[key] = entry
+        return entries
+
+    async def set_many(
+        self, schemas: Mapping[str, UserInfoSchema], delta: float = 0.0
+    ) -> None:
+        await self.set_entries(
+            {key: self.new_entry(schema, delta) for key, schema in schemas.items()}
         )
 
+    async def set_entries(
+        self, entries: Mapping[str, CacheEntry], version: int | None = None
+    ) -> builtins.set[str]:
+        """Fill entries expecting ``version``, return keys which were written."""
+        if not entries:
+            return set()
+        now = time.time()
+        expected = '' if version is None else str(version)
+        with timed('cache'):
+            async with self._connect.pipeline(transaction=False) as pipe:
+                for key, entry in entries.items():
+                    expires_at = entry.expires_at or now + CacheTimeout.USER_INFO.value
+                    ttl = max(int((expires_at - now) * 1000), 1)
+                    fields = chain(*self._codec.encode(entry).items())
+                    await self._fill(
+                        keys=[self._name(key)], args=[expected, ttl, *fields], client=pipe
+                    )
+                written = await pipe.execute()
+        return {key for key, ok in zip(entries, written) if ok}
+
+    async def delete_many(self, keys: Iterable[str]) -> None:
+        names = [self._name(key) for key in keys]
+        if not names:
+            return
+        with timed('cache'):
+            await self._connect.delete(*names)
+
 
 class UserCodeRedisCache(IUserCodeCache, RedisBaseCache):
     async def get(self, key: str) -> str | None:
-        code: bytes | None = await self._connect.get(
-            name=CacheName.CONFIRMATION_CODE.value.format(str(key)),
-        )
+        with timed('cache'):
+            code: bytes | None = await self._connect.get(
+                name=CacheName.CONFIRMATION_CODE.value.format(str(key)),
+            )
         return code.decode() if code else None
 
     async def set(self, key: str, code: str) -> None:
-        await self._connect.set(
-            name=CacheName.CONFIRMATION_CODE.value.format(key),
-            value=code,
-            ex=CacheTimeout.CONFIRMATION_CODE.value,
-        )
+        with timed('cache'):
+            await self._connect.set(
+                name=CacheName.CONFIRMATION_CODE.value.format(key),
+                value=code,
+                ex=CacheTimeout.CONFIRMATION_CODE.value,
+            )
@@ -0,0 +1,155 @@
+import asyncio
+import logging
+import time
+import uuid
+from collections.abc import Iterable, Mapping
+
+from core.lru import LRUCache
+from core.metrics import metrics
+from core.settings import settings
+from domain.constants.user_constants import USER_INFO_INVALIDATION_CHANNEL
+from domain.schemas.user_schemas import UserInfoSchema
+from repositories.cache.base_cache import CacheEntry, IUserBaseCache
+from repositories.cache.base_redis import RedisBaseCache
+from repositories.cache.user_redis import UserRedisCache
+
+
+class UserTwoTierCache(IUserBaseCache, RedisBaseCache):
+    """Per-worker LRU (L1) in front of ``UserRedisCache`` (L2).
+
+    Writes are announced on a Redis channel, every other worker drops its L1
+    entry of the user. L1 entries also expire after ``user_info_l1_ttl``
+    seconds in case an invalidation message is lost.
+    """
+
+    _local: LRUCache[str, CacheEntry] = LRUCache(
+        'cache.user_info.l1', max_size=settings.redis.user_info_l1_size
+    )
+    _worker_id: str = ''
+    _listener: asyncio.Task[None] | None = None
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._remote = UserRedisCache()
+
+    async def get(self, key: str) -> UserInfoSchema | None:
+        entry = await self.get_entry(key)
+        return entry.value if entry else None
+
+    async def get_entry(self, key: str) -> CacheEntry | None:
+        entry = self._local.get(key)
+        if entry is not None:
+            return self._copy(entry)
+        entry = await self._remote.get_entry(key)
+        if entry is None:
+            metrics.inc('cache.user_info.l2.misses')
+            return None
+        metrics.inc('cache.user_info.l2.hits')
+        self._set_local(key, entry)
+        return entry
+
+    async def set(
+        self,
+        key: str,
+        schema: UserInfoSchema,
+        delta: float = 0.0,
+        version: int | None = None,
+    ) -> None:
+        entry = self._remote.new_entry(schema, delta, version)
+        if await self._remote.set_entries({key: entry}, version):
+            self._set_local(key, entry)
+        else:
+            self._local.delete(key)
+
+    async def update_profile(self, key: str, profile: Mapping[str, str]) -> None:
+        await self._remote.update_profile(key, profile)
+        self._local.delete(key)
+
+    async def get_many(self, keys: Iterable[str]) -> dict[str, UserInfoSchema]:
+        schemas = {}
+        missing = []
+        for key in keys:
+            entry = self._local.get(key)
+            if entry is None:
+                missing.append(key)
+            else:
+                schemas[key] = self._copy(entry).value
+        remote = await self._remote.get_entries(missing)
+        metrics.inc('cache.user_info.l2.hits', len(remote))
+        metrics.inc('cache.user_info.l2.misses', len(missing) - len(remote))
+        for key, entry in remote.items():
+            self._set_local(key, entry)
+            schemas[key] = entry.value
+        return schemas
+
+    async def set_many(
+        self, schemas: Mapping[str, UserInfoSchema], delta: float = 0.0
+    ) -> None:
+        entries = {
+            key: self._remote.new_entry(schema, delta) for key, schema in schemas.items()
+        }
+        written = await self._remote.set_entries(entries)
+        for key, entry in entries.items():
+            if key in written:
+                self._set_local(key, entry)
+
+    async def delete_many(self, keys: Iterable[str]) -> None:
+        keys = list(keys)
+        await self._remote.delete_many(keys)
+        for key in keys:
+            self._local.delete(key)
+
+    async def invalidate(self, key: str) -> None:
+        await self._connect.publish(
+            USER_INFO_INVALIDATION_CHANNEL, f'{self._worker_id}:{key}'
+        )
+
+    def _set_local(self, key: str, entry: CacheEntry) -> None:
+        expires_at = time.time() + settings.redis.user_info_l1_ttl
+        if entry.expires_at is not None:
+            expires_at = min(expires_at, entry.expires_at)
+        self._local.set(key, self._copy(entry), expires_at=expires_at)
+
+    @staticmethod
+    def _copy(entry: CacheEntry) -> CacheEntry:
+        """Copy of the entry which can be changed without touching the L1 one."""
+        return entry._replace(value=entry.value.model_copy(deep=True))
+
+    @classmethod
+    def start_listener(cls) -> None:
+        """Start dropping L1 entries written by other workers.
+
+        The worker id is made here rather than on import, workers forked from
+        one process would share it and ignore each other's messages.
+        """
+        if cls._listener is None:
+            cls._worker_id = uuid.uuid4().hex
+            cls._listener = asyncio.create_task(cls()._listen())
+
+    @classmethod
+    async def stop_listener(cls) -> None:
+        if cls._listener is not None:
+            cls._listener.cancel()
+            await asyncio.gather(cls._listener, return_exceptions=True)
+        cls._listener = None
+
+    async def _listen(self) -> None:
+        while True:
+            try:
+                async with self._connect.pubsub() as pubsub:
+                    await pubsub.subscribe(USER_INFO_INVALIDATION_CHANNEL)
+                    # messages may have been missed while unsubscribed
+                    self._local.clear()
+                    async for message in pubsub.listen():
+                        if message['type'] == 'message':
+                            self._drop(message['data'].decode())
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logging.exception('User info invalidation listener failed.')
+                await asyncio.sleep(1)
+
+    def _drop(self, message: str) -> None:
+        worker_id, key = message.split(':', 1)
+        if worker_id != self._worker_id:
+            self._local.delete(key)
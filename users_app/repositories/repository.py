@@ -1,4 +1,5 @@
 from abc import abstractmethod
+from collections.abc import Awaitable, Callable, Sequence
 
 from pydantic import EmailStr
 
@@ -29,6 +30,13 @@ class IUserRepository:
         """Get user info by id."""
         pass
 
+    @abstractmethod
+    async def get_user_infos_by_ids(
+        self, user_ids: Sequence[UIDType]
+    ) -> dict[UIDType, UserInfoSchema]:
+        """Get user infos by ids, missing users are omitted."""
+        pass
+
     @abstractmethod
     async def get_user_info_by_email(self, email: EmailStr) -> UserInfoSchemaActive | None:
         """Get user info by email."""
@@ -52,6 +60,21 @@ class IUserRepository:
         pass
 
     @abstractmethod
-    async def update_user_avatar(self, user_id: UIDType, avatar_name: str) -> None:
-        """Update user avatar."""
+    async def update_user_avatar(self, user_id: UIDType, avatar_name: str) -> str | None:
+        """Update user avatar, return the previous one.
+
+        Holds the avatar until commit, so it is not released concurrently.
+        """
+        pass
+
+    @abstractmethod
+    async def release_avatar(
+        self, avatar_name: str, delete: Callable[[], Awaitable[None]]
+    ) -> None:
+        """Call ``delete`` after commit if no profile references the avatar."""
+        pass
+
+    @abstractmethod
+    async def is_admin(self, user_id: UIDType) -> bool:
+        """Whether user may use service endpoints."""
         pass
@@ -1,13 +1,27 @@
+from typing import Any
+
 import uvicorn
 from fastapi import FastAPI
 from sqladmin import Admin
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 
 from repositories.sql_db.admin.admin_views import ProfileAdmin, UserAdmin
 from repositories.sql_db.session import Database
 
 
+class DatabaseSessionMaker(async_sessionmaker[AsyncSession]):
+    """Session maker bound to the current engine of ``Database`` per session.
+
+    The admin is built with the app, while the engine is created and disposed
+    in the app lifespan, so it is resolved when a session is made.
+    """
+
+    def __call__(self, **local_kw: Any) -> AsyncSession:
+        return super().__call__(bind=Database().engine, **local_kw)
+
+
 def build_admin(app: FastAPI):
-    admin = Admin(app, Database().engine)
+    admin = Admin(app, session_maker=DatabaseSessionMaker())
     admin.add_view(UserAdmin)
     admin.add_view(ProfileAdmin)
     return admin
@@ -0,0 +1,32 @@
+"""index profiles.avatar.
+
+Revision ID: 8e1f4b6d2c90
+Revises: 5d3c9a1e7b42
+Create Date: 2026-10-18 13:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8e1f4b6d2c90'
+down_revision: Union[str, None] = '5d3c9a1e7b42'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Avatars are shared by content, releasing one checks for other references.
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_profiles_avatar',
+            'profiles',
+            ['avatar'],
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_profiles_avatar', table_name='profiles')
@@ -1,5 +1,14 @@
 from pydantic import EmailStr
-from sqlalchemy import BigInteger, Boolean, CheckConstraint, ForeignKey, Identity, String
+from sqlalchemy import (
+    BigInteger,
+    Boolean,
+    CheckConstraint,
+    ForeignKey,
+    Identity,
+    Index,
+    String,
+    func,
+)
 from sqlalchemy.orm import (
     Mapped,
     mapped_column,
@@ -17,7 +26,6 @@ class User(Base):
     email: Mapped[EmailStr] = mapped_column(
         String(100),
         CheckConstraint("email ~ ''^[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+.[A-Z|a-z]{2,}$''"),
-        unique=True,
         comment='User email',
     )
     is_active: Mapped[bool] = mapped_column(
@@ -44,6 +52,10 @@ class User(Base):
         'Profile', uselist=False, back_populates='user'
     )
 
+    __table_args__ = (
+        Index('ix_users_email_lower', func.lower(email), unique=True),
+    )
+
 
 class Profile(Base):
     user_id: Mapped[UIDType] = mapped_column(
@@ -51,5 +63,5 @@ class Profile(Base):
     )
     first_name: Mapped[str | None] = mapped_column(String(100), nullable=True)
     last_name: Mapped[str | None] = mapped_column(String(100), nullable=True)
-    avatar: Mapped[str | None] = mapped_column(String(128), nullable=True)
+    avatar: Mapped[str | None] = mapped_column(String(128), nullable=True, index=True)
     user: Mapped['User'] = relationship('User', back_populates='profile')
@@ -1,29 +1,168 @@
-from collections.abc import AsyncGenerator
+import itertools
+import time
+from collections.abc import AsyncGenerator, Iterator
 from contextlib import asynccontextmanager
+from typing import Any, ClassVar
 
-from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
 
+from core.metrics import metrics
 from core.settings import settings
+from core.timing import timed
 
 
-class Database:
-    def __init__(self) -> None:
-        self.engine = create_async_engine(
-            url=settings.db.db_url,
-            echo=settings.db.db_echo,
-        )
+class Replica:
+    """Read-only engine of a replica, skipped for a while after a failure."""
+
+    def __init__(self, engine: AsyncEngine) -> None:
+        self.engine = engine.execution_options(postgresql_readonly=True)
         self.session = async_sessionmaker(
             bind=self.engine,
             autoflush=False,
             autocommit=False,
             expire_on_commit=False,
         )
+        self.retry_at = 0.0
+
+    @property
+    def healthy(self) -> bool:
+        return time.monotonic() >= self.retry_at
+
+    def mark_down(self) -> None:
+        self.retry_at = time.monotonic() + settings.db.db_replica_retry
+        metrics.inc('db.replica.failures')
+
+
+class Database:
+    """Process-wide engine and session factory.
+
+    The engine is created once per worker and shared by every ``Database``
+    instance, so repositories reuse pooled connections instead of opening
+    a new pool per request.
+
+    Reads that tolerate replication lag may use ``get_read_session``, which
+    balances across ``db_replica_urls`` and falls back to the primary when
+    no replica is reachable.
+    """
+
+    _engine: AsyncEngine | None = None
+    _session_factory: async_sessionmaker[AsyncSession] | None = None
+    _replicas: ClassVar[list[Replica]] = []
+    _replica_counter: ClassVar[Iterator[int]] = itertools.count()
+
+    @classmethod
+    def connect(cls) -> AsyncEngine:
+        """Create shared engines and session factories if they do not exist yet."""
+        if cls._engine is None:
+            cls._engine = cls._create_engine(settings.db.db_url)
+            cls._session_factory = async_sessionmaker(
+                bind=cls._engine,
+                autoflush=False,
+                autocommit=False,
+                expire_on_commit=False,
+            )
+            cls._replicas = [
+                Replica(cls._create_engine(url)) for url in settings.db.db_replica_urls
+            ]
+        return cls._engine
+
+    @classmethod
+    async def disconnect(cls) -> None:
+        """Dispose shared engines and close pooled connections."""
+        if cls._engine is not None:
+            await cls._engine.dispose()
+        for replica in cls._replicas:
+            await replica.engine.dispose()
+        cls._engine = None
+        cls._session_factory = None
+        cls._replicas = []
+
+    @classmethod
+    def _create_engine(cls, url: str) -> AsyncEngine:
+        return create_async_engine(
+            url=url,
+            echo=settings.db.db_echo,
+            pool_size=settings.db.db_pool_size,
+            max_overflow=settings.db.db_max_overflow,
+            pool_recycle=settings.db.db_pool_recycle,
+            pool_pre_ping=settings.db.db_pool_pre_ping,
+            query_cache_size=settings.db.db_query_cache_size,
+            connect_args=cls._connect_args(),
+        )
+
+    @staticmethod
+    def _connect_args() -> dict[str, Any]:
+        connect_args: dict[str, Any] = {
+            'prepared_statement_cache_size': settings.db.db_prepared_statement_cache_size,
+        }
+        if settings.db.db_statement_timeout is not None:
+            connect_args['server_settings'] = {
+                'statement_timeout': str(settings.db.db_statement_timeout),
+            }
+        return connect_args
+
+    @property
+    def has_replicas(self) -> bool:
+        self.connect()
+        return bool(self._replicas)
+
+    @property
+    def engine(self) -> AsyncEngine:
+        return self.connect()
+
+    @property
+    def session(self) -> async_sessionmaker[AsyncSession]:
+        self.connect()
+        assert self._session_factory is not None
+        return self._session_factory
 
     @asynccontextmanager
     async def get_session(self) -> AsyncGenerator[AsyncSession, None]:
-        async with self.session() as session:
+        with timed('db'):
+            async with self.session() as session:
+                try:
+                    yield session
+                except Exception as error:
+                    await session.rollback()
+                    raise error
+
+    @asynccontextmanager
+    async def get_read_session(self) -> AsyncGenerator[AsyncSession, None]:
+        """Session of a healthy replica, of the primary if there is none."""
+        with timed('db'):
+            async with await self._read_session() as session:
+                try:
+                    yield session
+                except Exception as error:
+                    await session.rollback()
+                    raise error
+
+    async def _read_session(self) -> AsyncSession:
+        self.connect()
+        for replica in self._healthy_replicas():
+            session = replica.session()
             try:
-                yield session
-            except Exception as error:
-                await session.rollback()
-                raise error
+                await session.connection()
+            except (DBAPIError, OSError):
+                await session.close()
+                replica.mark_down()
+                continue
+            return session
+        if self._replicas:
+            metrics.inc('db.replica.primary_fallback')
+        return self.session()
+
+    def _healthy_replicas(self) -> Iterator[Replica]:
+        """Healthy replicas in round-robin order."""
+        if not self._replicas:
+            return
+        start = next(self._replica_counter) % len(self._replicas)
+        for replica in self._replicas[start:] + self._replicas[:start]:
+            if replica.healthy:
+                yield replica
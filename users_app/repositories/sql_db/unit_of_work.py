@@ -0,0 +1,86 @@
+from collections.abc import AsyncGenerator, Awaitable, Callable
+from contextvars import ContextVar
+from types import TracebackType
+from typing import Self
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core.timing import timed
+from repositories.sql_db.session import Database
+
+
+_current: ContextVar['UnitOfWork | None'] = ContextVar('unit_of_work', default=None)
+
+
+class UnitOfWork:
+    """One primary database transaction shared by the repository calls of a request.
+
+    The session is checked out on first use, so requests answered from the cache
+    do not touch the pool. It is committed once when the unit of work exits
+    without an error and rolled back otherwise. Callbacks registered with
+    ``after_commit`` run only after a successful commit, so caches never see
+    rolled back data.
+    """
+
+    def __init__(self) -> None:
+        self._session: AsyncSession | None = None
+        self._after_commit: list[Callable[[], Awaitable[None]]] = []
+
+    @staticmethod
+    def current() -> 'UnitOfWork | None':
+        """Unit of work of the current request, if any."""
+        return _current.get()
+
+    async def __aenter__(self) -> Self:
+        return self
+
+    async def __aexit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        try:
+            if exc_type is None:
+                await self.commit()
+            else:
+                await self.rollback()
+        finally:
+            await self.close()
+
+    def session(self) -> AsyncSession:
+        """Session of the unit of work, created on first use."""
+        if self._session is None:
+            self._session = Database().session()
+        return self._session
+
+    def after_commit(self, callback: Callable[[], Awaitable[None]]) -> None:
+        self._after_commit.append(callback)
+
+    async def commit(self) -> None:
+        if self._session is not None:
+            with timed('db'):
+                await self._session.commit()
+        callbacks, self._after_commit = self._after_commit, []
+        for callback in callbacks:
+            await callback()
+
+    async def rollback(self) -> None:
+        self._after_commit.clear()
+        if self._session is not None:
+            await self._session.rollback()
+
+    async def close(self) -> None:
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+
+async def request_unit_of_work() -> AsyncGenerator[UnitOfWork, None]:
+    """Dependency making one unit of work current for the whole request."""
+    async with UnitOfWork() as unit_of_work:
+        token = _current.set(unit_of_work)
+        try:
+            yield unit_of_work
+        finally:
+            _current.reset(token)
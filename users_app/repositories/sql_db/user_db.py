@@ -1,90 +1,272 @@
+from collections.abc import Sequence
+from typing import Any, TypeVar
+
 from pydantic import EmailStr
-from sqlalchemy import select, update
+from sqlalchemy import (
+    BigInteger,
+    String,
+    any_,
+    bindparam,
+    exists,
+    func,
+    or_,
+    select,
+    update,
+)
+from sqlalchemy.dialects.postgresql import ARRAY, insert
+from sqlalchemy.engine import RowMapping
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import joinedload
 
 from domain.custom_types.types_users import UIDType
-from domain.schemas.user_schemas import ProfileUpdateSchema, UserRegistrationInputSchema
+from domain.schemas.user_schemas import (
+    ProfileInfoSchema,
+    ProfileSchema,
+    ProfileUpdateSchema,
+    UserCredentialsSchema,
+    UserInfoSchema,
+    UserInfoSchemaActive,
+    UserRegistrationInputSchema,
+)
 from repositories.sql_db.models import Profile, User
 
 
+UserInfoT = TypeVar('UserInfoT', bound=UserInfoSchema)
+
+USER_INFO_COLUMNS = (
+    User.user_id,
+    User.email,
+    Profile.first_name,
+    Profile.last_name,
+    Profile.avatar,
+)
+
+
+GET_CREDENTIALS_BY_EMAIL = select(
+    User.user_id, User.email, User.password, User.is_active
+).where(func.lower(User.email) == func.lower(bindparam('email')))
+
+_new_user = (
+    insert(User)
+    .values(
+        email=bindparam('new_email'),
+        password=bindparam('new_password'),
+        # Python side column defaults are not applied to inserts in a CTE.
+        is_active=False,
+        is_stuff=False,
+        is_super_user=False,
+    )
+    .on_conflict_do_nothing(index_elements=[func.lower(User.email)])
+    .returning(User.user_id, User.email)
+    .cte('new_user')
+)
+_new_profile = (
+    insert(Profile)
+    .from_select(
+        [Profile.user_id, Profile.first_name, Profile.last_name],
+        select(
+            _new_user.c.user_id,
+            bindparam('new_first_name', type_=String),
+            bindparam('new_last_name', type_=String),
+        ),
+    )
+    .returning(Profile.user_id, Profile.first_name, Profile.last_name, Profile.avatar)
+    .cte('new_profile')
+)
+CREATE_USER = select(
+    _new_user.c.user_id,
+    _new_user.c.email,
+    _new_profile.c.first_name,
+    _new_profile.c.last_name,
+    _new_profile.c.avatar,
+).join_from(_new_user, _new_profile, _new_user.c.user_id == _new_profile.c.user_id)
+
+GET_USER_INFO_BY_ID = (
+    select(*USER_INFO_COLUMNS)
+    .join_from(User, Profile)
+    .where(User.user_id == bindparam('user_id'))
+)
+GET_USER_INFOS_BY_IDS = (
+    select(*USER_INFO_COLUMNS)
+    .join_from(User, Profile)
+    .where(User.user_id == any_(bindparam('user_ids', type_=ARRAY(BigInteger))))
+)
+GET_USER_INFO_BY_EMAIL = (
+    select(*USER_INFO_COLUMNS, User.is_active)
+    .join_from(User, Profile)
+    .where(func.lower(User.email) == func.lower(bindparam('email')))
+)
+
+UPDATE_PROFILE = (
+    update(Profile)
+    .where(Profile.user_id == bindparam('target_user_id'))
+    .values(
+        first_name=func.coalesce(
+            bindparam('new_first_name', type_=String), Profile.first_name
+        ),
+        last_name=func.coalesce(
+            bindparam('new_last_name', type_=String), Profile.last_name
+        ),
+    )
+    .returning(Profile.first_name, Profile.last_name)
+    .execution_options(synchronize_session=False)
+)
+ACTIVATE_USER = (
+    update(User)
+    .where(User.user_id == bindparam('target_user_id'))
+    .values(is_active=True)
+    .execution_options(synchronize_session=False)
+)
+CHANGE_PASSWORD = (
+    update(User)
+    .where(User.user_id == bindparam('target_user_id'))
+    .values(password=bindparam('new_password'))
+    .execution_options(synchronize_session=False)
+)
+_old_profile = (
+    select(Profile.user_id, Profile.avatar)
+    .where(Profile.user_id == bindparam('target_user_id'))
+    .with_for_update()
+    .subquery('old_profile')
+)
+UPDATE_USER_AVATAR = (
+    update(Profile)
+    .where(Profile.user_id == _old_profile.c.user_id)
+    .values(avatar=bindparam('new_avatar'))
+    .returning(_old_profile.c.avatar)
+    .execution_options(synchronize_session=False)
+)
+LOCK_AVATAR = select(
+    func.pg_advisory_xact_lock(func.hashtextextended(bindparam('avatar', type_=String), 0))
+)
+AVATAR_REFERENCED = select(exists().where(Profile.avatar == bindparam('avatar')))
+IS_ADMIN = select(or_(User.is_stuff, User.is_super_user)).where(
+    User.user_id == bindparam('user_id')
+)
+
+
 class UserPostgres:
+    """Queries of users.
+
+    Hot read paths select only the needed columns with Core statements and
+    build schemas from rows with ``model_construct``, without loading ORM
+    objects, the values have already been validated by the database schema.
+
+    Statements are built once at import time and take their values as bound
+    parameters, so SQLAlchemy generates each cache key once and every call
+    hits the compiled cache and the asyncpg prepared statement cache.
+
+    Methods do not commit, the unit of work of the caller does.
+    """
+
     def __init__(self, session: AsyncSession):
         self.session = session
 
+    @staticmethod
+    def _user_info(
+        row: RowMapping,
+        schema: type[UserInfoT] = UserInfoSchema,  # type: ignore[assignment]
+        **fields: Any,
+    ) -> UserInfoT:
+        return schema.model_construct(
+            user_id=row['user_id'],
+            email=row['email'],
+            profile=ProfileInfoSchema.model_construct(
+                first_name=row['first_name'],
+                last_name=row['last_name'],
+                avatar=row['avatar'],
+            ),
+            **fields,
+        )
+
     async def get_by_id(self, user_id: UIDType) -> User | None:
         """Get user by id."""
         user = await self.session.get(User, user_id)
         return user
 
-    async def get_by_email(self, email: EmailStr) -> User | None:
-        """Get user by email."""
-        stmt = select(User).where(User.email == email)
-        user = await self.session.scalar(statement=stmt)
-        return user
+    async def get_by_email(self, email: EmailStr) -> UserCredentialsSchema | None:
+        """Get user credentials by email."""
+        result = await self.session.execute(GET_CREDENTIALS_BY_EMAIL, {'email': email})
+        row = result.mappings().one_or_none()
+        return UserCredentialsSchema.model_construct(**row) if row else None
 
-    async def exists_by_email(self, email: EmailStr) -> bool:
-        """Check if user exists by email."""
-        stmt = select(select(User).where(User.email == email).exists())
-        user = await self.session.scalar(statement=stmt)
-        return True if user else False
-
-    async def create(self, user_schema: UserRegistrationInputSchema) -> User:
-        """Create a new user in db."""
-        user = User(**user_schema.model_dump(exclude={'re_password', 'profile'}))
-        profile = Profile(
-            user=user, **user_schema.profile.model_dump() if user_schema.profile else {}
+    async def create(
+        self, user_schema: UserRegistrationInputSchema
+    ) -> UserInfoSchema | None:
+        """Create a new user with profile in one statement, ``None`` if email is taken."""
+        profile = user_schema.profile.model_dump() if user_schema.profile else {}
+        result = await self.session.execute(
+            CREATE_USER,
+            {
+                'new_email': user_schema.email,
+                'new_password': user_schema.password,
+                'new_first_name': profile.get('first_name'),
+                'new_last_name': profile.get('last_name'),
+            },
         )
-        user.profile = profile
-        self.session.add(user)
-        await self.session.commit()
-        return user
+        row = result.mappings().one_or_none()
+        return self._user_info(row) if row else None
 
-    async def get_user_info_by_id(self, user_id: UIDType) -> User | None:
+    async def get_user_info_by_id(self, user_id: UIDType) -> UserInfoSchema | None:
         """Get user info by id."""
-        stmt = (
-            select(User)
-            .options(joinedload(User.profile, innerjoin=True))
-            .where(User.user_id == user_id)
+        result = await self.session.execute(GET_USER_INFO_BY_ID, {'user_id': user_id})
+        row = result.mappings().one_or_none()
+        return self._user_info(row) if row else None
+
+    async def get_user_infos_by_ids(
+        self, user_ids: Sequence[UIDType]
+    ) -> list[UserInfoSchema]:
+        """Get user infos by ids with a single ``= ANY(...)`` query."""
+        result = await self.session.execute(
+            GET_USER_INFOS_BY_IDS, {'user_ids': list(user_ids)}
         )
-        return await self.session.scalar(statement=stmt)
+        return [self._user_info(row) for row in result.mappings()]
 
-    async def get_user_info_by_email(self, email: EmailStr) -> User | None:
+    async def get_user_info_by_email(self, email: EmailStr) -> UserInfoSchemaActive | None:
         """"Get user info by email."""
-        stmt = (
-            select(User)
-            .where(User.email == email)
-            .options(joinedload(User.profile, innerjoin=True))
-        )
-        return await self.session.scalar(statement=stmt)
+        result = await self.session.execute(GET_USER_INFO_BY_EMAIL, {'email': email})
+        row = result.mappings().one_or_none()
+        if not row:
+            return None
+        return self._user_info(row, UserInfoSchemaActive, is_active=row['is_active'])
 
     async def update_profile(
         self, user_id: UIDType, profile_schema: ProfileUpdateSchema
-    ) -> Profile | None:
-        stmt = (
-            update(Profile)
-            .where(Profile.user_id == user_id)
-            .values(**profile_schema.model_dump(
-                exclude_none=True,
-                include={'first_name', 'last_name'})
-                )
-            .returning(Profile)
+    ) -> ProfileSchema | None:
+        result = await self.session.execute(
+            UPDATE_PROFILE,
+            {
+                'target_user_id': user_id,
+                'new_first_name': profile_schema.first_name,
+                'new_last_name': profile_schema.last_name,
+            },
         )
-        profile = await self.session.scalar(statement=stmt)
-        await self.session.commit()
-        return profile
+        row = result.mappings().one_or_none()
+        return ProfileSchema.model_construct(**row) if row else None
 
     async def activate_user(self, user_id: UIDType) -> None:
-        stmt = update(User).where(User.user_id == user_id).values(is_active=True)
-        await self.session.execute(statement=stmt)
-        await self.session.commit()
+        await self.session.execute(ACTIVATE_USER, {'target_user_id': user_id})
 
     async def change_password(self, user_id: UIDType, new_password: str) -> None:
-        stmt = update(User).where(User.user_id == user_id).values(password=new_password)
-        await self.session.execute(statement=stmt)
-        await self.session.commit()
-
-    async def update_user_avatar(self, user_id: UIDType, avatar_name: str) -> None:
-        stmt = update(Profile).where(Profile.user_id == user_id).values(avatar=avatar_name)
-        await self.session.execute(statement=stmt)
-        await self.session.commit()
+        await self.session.execute(
+            CHANGE_PASSWORD,
+            {'target_user_id': user_id, 'new_password': new_password},
+        )
+
+    async def update_user_avatar(self, user_id: UIDType, avatar_name: str) -> str | None:
+        """Update avatar and return the previous one."""
+        await self.lock_avatar(avatar_name)
+        return await self.session.scalar(
+            UPDATE_USER_AVATAR,
+            {'target_user_id': user_id, 'new_avatar': avatar_name},
+        )
+
+    async def lock_avatar(self, avatar_name: str) -> None:
+        """Serialize changes of references to the avatar until commit."""
+        await self.session.execute(LOCK_AVATAR, {'avatar': avatar_name})
+
+    async def is_avatar_referenced(self, avatar_name: str) -> bool:
+        return bool(await self.session.scalar(AVATAR_REFERENCED, {'avatar': avatar_name}))
+
+    async def is_admin(self, user_id: UIDType) -> bool:
+        """Whether user is staff or super user, unknown users are not."""
+        return bool(await self.session.scalar(IS_ADMIN, {'user_id': user_id}))
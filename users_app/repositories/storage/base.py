@@ -1,7 +1,69 @@
+import os
 from abc import ABC, abstractmethod
+from collections.abc import AsyncIterable, AsyncIterator, Sequence
+from pathlib import Path
+from typing import NamedTuple
+
+
+class AvatarLocation(NamedTuple):
+    """Avatar served from a local file with its stat or redirected to a URL."""
+
+    path: Path | None = None
+    stat: os.stat_result | None = None
+    url: str | None = None
+
+
+class AvatarObject(NamedTuple):
+    """Metadata of a stored avatar."""
+
+    size: int
+
+
+class PresignedUpload(NamedTuple):
+    """URL and form fields a client posts the avatar to."""
+
+    url: str
+    fields: dict[str, str]
 
 
 class IStorage(ABC):
     @abstractmethod
-    async def upload_avatar(self, object: bytes, obj_name: str) -> None:
+    async def upload_avatar(
+        self, body: bytes | AsyncIterable[bytes], obj_name: str, content_type: str
+    ) -> None:
+        """Store avatar from bytes or chunks, nothing is stored if the iteration fails."""
+        raise NotImplementedError()
+
+    @abstractmethod
+    async def avatar_exists(self, obj_name: str) -> bool:
+        raise NotImplementedError()
+
+    @abstractmethod
+    async def delete_avatars(self, obj_names: Sequence[str]) -> None:
+        """Delete avatars, missing ones are skipped."""
+        raise NotImplementedError()
+
+    @abstractmethod
+    async def locate_avatar(self, obj_name: str) -> AvatarLocation | None:
+        """Where to serve avatar from, ``None`` if it is not stored."""
+        raise NotImplementedError()
+
+    @abstractmethod
+    async def get_avatar_object(self, obj_name: str) -> AvatarObject | None:
+        raise NotImplementedError()
+
+    @abstractmethod
+    def read_avatar(self, obj_name: str) -> AsyncIterator[bytes]:
+        """Chunks of avatar, ``FileNotFoundError`` is raised if it is not stored."""
+        raise NotImplementedError()
+
+    @abstractmethod
+    async def create_avatar_upload(
+        self, obj_name: str, content_type: str, max_size: int, expires_in: int
+    ) -> PresignedUpload:
+        """Let a client upload avatar of the type and size directly to the storage.
+
+        Raises:
+            NotImplementedError: storage takes avatars through the API only.
+        """
         raise NotImplementedError()
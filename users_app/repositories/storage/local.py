@@ -1,16 +1,71 @@
+import contextlib
+from collections.abc import AsyncIterable, AsyncIterator, Sequence
 from pathlib import Path
 
 import aiofiles
+import aiofiles.os
 
-from domain.constants.avatar_constants import AVATAR_BUCKET
-from repositories.storage.base import IStorage
+from domain.constants.avatar_constants import AVATAR_BUCKET, AVATAR_CHUNK_SIZE
+from repositories.storage.base import (
+    AvatarLocation,
+    AvatarObject,
+    IStorage,
+    PresignedUpload,
+)
 
 
 class LocalStorage(IStorage):
-    async def upload_avatar(self, object: bytes, obj_name: str) -> None:
+    async def upload_avatar(
+        self, body: bytes | AsyncIterable[bytes], obj_name: str, content_type: str
+    ) -> None:
+        """Write body to a temporary file renamed over the avatar when complete."""
         self._create_folder()
-        async with aiofiles.open(Path(AVATAR_BUCKET) / obj_name, 'wb+') as file:
-            await file.write(object)
+        path = Path(AVATAR_BUCKET) / obj_name
+        part_path = path.with_name(f'{path.name}.part')
+        try:
+            async with aiofiles.open(part_path, 'wb') as file:
+                if isinstance(body, bytes):
+                    await file.write(body)
+                else:
+                    async for chunk in body:
+                        await file.write(chunk)
+            await aiofiles.os.replace(part_path, path)
+        except BaseException:
+            if await aiofiles.os.path.exists(part_path):
+                await aiofiles.os.remove(part_path)
+            raise
+
+    async def avatar_exists(self, obj_name: str) -> bool:
+        return await aiofiles.os.path.exists(Path(AVATAR_BUCKET) / obj_name)
+
+    async def delete_avatars(self, obj_names: Sequence[str]) -> None:
+        for obj_name in obj_names:
+            with contextlib.suppress(FileNotFoundError):
+                await aiofiles.os.remove(Path(AVATAR_BUCKET) / obj_name)
+
+    async def locate_avatar(self, obj_name: str) -> AvatarLocation | None:
+        path = Path(AVATAR_BUCKET) / obj_name
+        try:
+            stat = await aiofiles.os.stat(path)
+        except FileNotFoundError:
+            return None
+        return AvatarLocation(path=path, stat=stat)
+
+    async def get_avatar_object(self, obj_name: str) -> AvatarObject | None:
+        location = await self.locate_avatar(obj_name)
+        if location is None or location.stat is None:
+            return None
+        return AvatarObject(size=location.stat.st_size)
+
+    async def read_avatar(self, obj_name: str) -> AsyncIterator[bytes]:
+        async with aiofiles.open(Path(AVATAR_BUCKET) / obj_name, 'rb') as file:
+            while chunk := await file.read(AVATAR_CHUNK_SIZE):
+                yield chunk
+
+    async def create_avatar_upload(
+        self, obj_name: str, content_type: str, max_size: int, expires_in: int
+    ) -> PresignedUpload:
+        raise NotImplementedError('Local storage takes avatars through the API only')
 
     @staticmethod
     def _create_folder() -> None:
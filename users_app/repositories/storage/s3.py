@@ -1,22 +1,183 @@
-from collections.abc import Callable
-from contextlib import AbstractAsyncContextManager
-from typing import TYPE_CHECKING
+import logging
+import tempfile
+import time
+from collections.abc import AsyncIterable, AsyncIterator, Sequence
+from typing import IO
 
-from domain.constants.avatar_constants import AVATAR_BUCKET
+import anyio
+from botocore.exceptions import ClientError
+from types_aiobotocore_s3 import S3Client
+from types_aiobotocore_s3.type_defs import LifecycleRuleTypeDef
+
+from core.lru import LRUCache
+from core.settings import settings
+from domain.constants.avatar_constants import (
+    AVATAR_BUCKET,
+    AVATAR_CACHE_CONTROL,
+    AVATAR_CHUNK_SIZE,
+    AVATAR_UPLOAD_ROOT,
+)
+from repositories.storage.base import (
+    AvatarLocation,
+    AvatarObject,
+    IStorage,
+    PresignedUpload,
+)
 from repositories.storage.s3client import ClientS3
 
 
-if TYPE_CHECKING:
-    from types_aiobotocore_s3 import S3Client
+_avatar_urls: LRUCache[str, str] = LRUCache('cache.avatar_url', max_size=10_000)
+
+UPLOAD_EXPIRY_RULE = 'expire-avatar-uploads'
 
 
-from repositories.storage.base import IStorage
+def _is_missing(error: ClientError) -> bool:
+    return error.response.get('Error', {}).get('Code') in ('404', 'NoSuchKey')
 
 
 class S3Storage(IStorage):
     def __init__(self) -> None:
-        self._client: Callable[[], AbstractAsyncContextManager[S3Client]] = ClientS3().get
+        self._client = ClientS3.connect
+
+    async def upload_avatar(
+        self, body: bytes | AsyncIterable[bytes], obj_name: str, content_type: str
+    ) -> None:
+        """Put bytes as they are, spool chunks to a temporary file and stream it.
+
+        Avatars are below the 5 MiB minimum part size of multipart uploads, so
+        a single ``put_object`` reading the file is used instead of buffering
+        the whole body in memory for one part.
+        """
+        if isinstance(body, bytes):
+            await self._put_avatar(body, len(body), obj_name, content_type)
+            return
+        with tempfile.TemporaryFile() as file:
+            async_file = anyio.wrap_file(file)
+            size = 0
+            async for chunk in body:
+                size += await async_file.write(chunk)
+            await async_file.flush()
+            file.seek(0)
+            await self._put_avatar(file, size, obj_name, content_type)
+
+    async def _put_avatar(
+        self, body: bytes | IO[bytes], size: int, obj_name: str, content_type: str
+    ) -> None:
+        s3_client = await self._client()
+        await s3_client.put_object(
+            Body=body,
+            Bucket=AVATAR_BUCKET,
+            Key=obj_name,
+            ContentLength=size,
+            ContentType=content_type,
+            CacheControl=AVATAR_CACHE_CONTROL,
+        )
+
+    async def avatar_exists(self, obj_name: str) -> bool:
+        return await self.get_avatar_object(obj_name) is not None
+
+    async def get_avatar_object(self, obj_name: str) -> AvatarObject | None:
+        s3_client = await self._client()
+        try:
+            response = await s3_client.head_object(Bucket=AVATAR_BUCKET, Key=obj_name)
+        except ClientError as error:
+            if _is_missing(error):
+                return None
+            raise
+        return AvatarObject(size=response['ContentLength'])
+
+    async def read_avatar(self, obj_name: str) -> AsyncIterator[bytes]:
+        s3_client = await self._client()
+        try:
+            response = await s3_client.get_object(Bucket=AVATAR_BUCKET, Key=obj_name)
+        except ClientError as error:
+            if _is_missing(error):
+                raise FileNotFoundError(obj_name) from None
+            raise
+        async with response['Body'] as body:
+            while chunk := await body.read(AVATAR_CHUNK_SIZE):
+                yield chunk
+
+    async def create_avatar_upload(
+        self, obj_name: str, content_type: str, max_size: int, expires_in: int
+    ) -> PresignedUpload:
+        """Presigned POST whose policy pins the key, type and size of the object."""
+        s3_client = await self._client()
+        fields = {'Content-Type': content_type}
+        post = await s3_client.generate_presigned_post(
+            Bucket=AVATAR_BUCKET,
+            Key=obj_name,
+            Fields=fields,
+            Conditions=[
+                *({name: value} for name, value in fields.items()),
+                ['content-length-range', 1, max_size],
+            ],
+            ExpiresIn=expires_in,
+        )
+        return PresignedUpload(url=post['url'], fields=post['fields'])
+
+    @staticmethod
+    async def expire_uploads() -> None:
+        """Add bucket lifecycle rule deleting direct uploads that were never confirmed.
+
+        Confirmed uploads are deleted right away, the rule collects abandoned
+        ones. Other lifecycle rules of the bucket are kept.
+        """
+        s3_client = await ClientS3.connect()
+        rule: LifecycleRuleTypeDef = {
+            'ID': UPLOAD_EXPIRY_RULE,
+            'Filter': {'Prefix': AVATAR_UPLOAD_ROOT},
+            'Status': 'Enabled',
+            'Expiration': {'Days': settings.storage.avatar_upload_expiry_days},
+            'AbortIncompleteMultipartUpload': {'DaysAfterInitiation': 1},
+        }
+        try:
+            rules = await S3Storage._other_lifecycle_rules(s3_client)
+            await s3_client.put_bucket_lifecycle_configuration(
+                Bucket=AVATAR_BUCKET,
+                LifecycleConfiguration={'Rules': [*rules, rule]},
+            )
+        except ClientError:
+            # Abandoned uploads only take space until the rule is set up.
+            logging.exception('Failed to set expiry of avatar uploads')
+
+    @staticmethod
+    async def _other_lifecycle_rules(s3_client: S3Client) -> list[LifecycleRuleTypeDef]:
+        """Lifecycle rules of the bucket except the upload expiry."""
+        try:
+            response = await s3_client.get_bucket_lifecycle_configuration(
+                Bucket=AVATAR_BUCKET
+            )
+        except ClientError as error:
+            if error.response.get('Error', {}).get('Code') == 'NoSuchLifecycleConfiguration':
+                return []
+            raise
+        return [rule for rule in response['Rules'] if rule.get('ID') != UPLOAD_EXPIRY_RULE]
+
+    async def delete_avatars(self, obj_names: Sequence[str]) -> None:
+        s3_client = await self._client()
+        await s3_client.delete_objects(
+            Bucket=AVATAR_BUCKET,
+            Delete={
+                'Objects': [{'Key': obj_name} for obj_name in obj_names],
+                'Quiet': True,
+            },
+        )
+
+    async def locate_avatar(self, obj_name: str) -> AvatarLocation | None:
+        """Presigned URL of avatar, reused for the first half of its lifetime.
 
-    async def upload_avatar(self, object: bytes, obj_name: str) -> None:
-        async with self._client() as s3_client:
-            await s3_client.put_object(Body=object, Bucket=AVATAR_BUCKET, Key=obj_name)
+        The object is not checked, a missing avatar is reported by S3 after the
+        redirect. Reusing URLs lets clients cache the redirect target.
+        """
+        url = _avatar_urls.get(obj_name)
+        if url is None:
+            ttl = settings.storage.avatar_url_ttl
+            s3_client = await self._client()
+            url = await s3_client.generate_presigned_url(
+                'get_object',
+                Params={'Bucket': AVATAR_BUCKET, 'Key': obj_name},
+                ExpiresIn=ttl,
+            )
+            _avatar_urls.set(obj_name, url, expires_at=time.time() + ttl / 2)
+        return AvatarLocation(url=url)
@@ -1,14 +1,25 @@
+import asyncio
 import logging
-from collections.abc import AsyncGenerator
-from contextlib import asynccontextmanager
+from contextlib import AsyncExitStack
 
 import aioboto3
+from botocore.config import Config
 from types_aiobotocore_s3 import S3Client
 
 from core.settings import settings
 
 
 class ClientS3:
+    """S3 client shared by the whole process.
+
+    The client keeps botocore's endpoint resolution and HTTP connection pool
+    warm between uploads, it is opened in the app lifespan and closed on shutdown.
+    """
+
+    _client: S3Client | None = None
+    _exit_stack: AsyncExitStack | None = None
+    _lock = asyncio.Lock()
+
     def __init__(self) -> None:
         self._url = settings.storage.storage_path
         self._key = settings.storage.s3_key
@@ -20,8 +31,40 @@ class ClientS3:
             region_name=self._region_name,
         )
 
-    @asynccontextmanager
-    async def get(self) -> AsyncGenerator[S3Client, None]:
-        async with self._session.client('s3', endpoint_url=self._url) as s3:
-            yield s3
+    @staticmethod
+    def _config() -> Config:
+        return Config(
+            max_pool_connections=settings.storage.s3_max_pool_connections,
+            connect_timeout=settings.storage.s3_connect_timeout,
+            read_timeout=settings.storage.s3_read_timeout,
+            tcp_keepalive=True,
+        )
+
+    @classmethod
+    async def connect(cls) -> S3Client:
+        """Open shared client if it is not open yet."""
+        client = cls._client
+        if client is not None:
+            return client
+        async with cls._lock:
+            client = cls._client
+            if client is None:
+                instance = cls()
+                exit_stack = AsyncExitStack()
+                client = await exit_stack.enter_async_context(
+                    instance._session.client(
+                        's3', endpoint_url=instance._url, config=cls._config()
+                    )
+                )
+                cls._client = client
+                cls._exit_stack = exit_stack
+        return client
+
+    @classmethod
+    async def disconnect(cls) -> None:
+        """Close shared client and its connection pool."""
+        if cls._exit_stack is not None:
+            await cls._exit_stack.aclose()
             logging.info('S3 client closed.')
+        cls._exit_stack = None
+        cls._client = None
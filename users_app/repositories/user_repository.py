@@ -1,13 +1,21 @@
-from collections.abc import Callable
-from contextlib import AbstractAsyncContextManager
+import asyncio
+import logging
+import time
+from collections.abc import AsyncGenerator, Awaitable, Callable, Mapping, Sequence
+from contextlib import AbstractAsyncContextManager, asynccontextmanager
+from functools import partial
 
 from pydantic import EmailStr
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from core.dependency import impl
+from core.metrics import metrics
+from core.settings import settings
+from core.single_flight import SingleFlight
+from core.timing import timed
+from domain.constants.user_constants import CacheName
 from domain.custom_types.types_users import UIDType
 from domain.schemas.user_schemas import (
-    ProfileInfoSchema,
     ProfileSchema,
     ProfileUpdateSchema,
     UserCredentialsSchema,
@@ -16,64 +24,179 @@ from domain.schemas.user_schemas import (
     UserRegistrationInputSchema,
 )
 from repositories.cache.base_cache import IUserBaseCache
+from repositories.cache.redis_lock import RedisLock
 from repositories.repository import IUserRepository
-from repositories.sql_db.models.user import Profile, User
 from repositories.sql_db.session import Database
+from repositories.sql_db.unit_of_work import UnitOfWork
 from repositories.sql_db.user_db import UserPostgres
 
 
+_user_info_flight: SingleFlight[UserInfoSchema | None] = SingleFlight(
+    'single_flight.user_info'
+)
+_background_tasks: set[asyncio.Task[UserInfoSchema | None]] = set()
+
+
 class UserRepository(IUserRepository):
+    """Users in the database behind the user info cache.
+
+    Profile and batch reads tolerate replication lag and go to replicas, a
+    miss there is rechecked on the primary, so a just created user is found.
+    Credentials, writes and reads that decide on fresh state stay on the
+    primary, a lagging replica would still accept a replaced password.
+
+    Request paths run in the unit of work of the request, a single primary
+    transaction committed once, and update the cache after the commit. Cache
+    fills shared between requests use their own sessions.
+    """
+
     def __init__(self):
         self._cache: IUserBaseCache = impl.container.resolve(IUserBaseCache)
+        database = Database()
         self._session: Callable[
             [], AbstractAsyncContextManager[AsyncSession]
-        ] = Database().get_session
+        ] = database.get_session
+        self._read_session: Callable[
+            [], AbstractAsyncContextManager[AsyncSession]
+        ] = database.get_read_session
+        self._has_replicas = database.has_replicas
+
+    @asynccontextmanager
+    async def _transaction(self) -> AsyncGenerator[UnitOfWork, None]:
+        """Unit of work of the request, outside of requests a new one per call."""
+        unit_of_work = UnitOfWork.current()
+        if unit_of_work is not None:
+            with timed('db'):
+                yield unit_of_work
+            return
+        async with UnitOfWork() as unit_of_work:
+            with timed('db'):
+                yield unit_of_work
+
+    async def _update_cached_profile(
+        self, user_id: UIDType, profile: Mapping[str, str]
+    ) -> None:
+        await self._cache.update_profile(str(user_id), profile)
+        await self._cache.invalidate(str(user_id))
+
+    async def _cache_created(self, schema: UserInfoSchema) -> None:
+        await self._cache.set(key=str(schema.user_id), schema=schema)
+        await self._cache.invalidate(str(schema.user_id))
 
     async def get_by_email(self, email: EmailStr) -> UserCredentialsSchema | None:
-        async with self._session() as session:
-            user: User | None = await UserPostgres(session).get_by_email(email)
-        return (
-            UserCredentialsSchema.model_validate(user, from_attributes=True)
-            if user else None
-        )
+        async with self._transaction() as unit_of_work:
+            return await UserPostgres(unit_of_work.session()).get_by_email(email)
 
     async def create(
         self,
         user_schema: UserRegistrationInputSchema
     ) -> UserInfoSchema | None:
-        async with self._session() as session:
-            db = UserPostgres(session)
-            exists = await db.exists_by_email(user_schema.email)
-            if exists:
-                return None
-            user = await db.create(user_schema)
-        schema = UserInfoSchema.model_validate(user, from_attributes=True)
-        await self._cache.set(key=str(schema.user_id), schema=schema,)
+        async with self._transaction() as unit_of_work:
+            schema = await UserPostgres(unit_of_work.session()).create(user_schema)
+            if schema is not None:
+                unit_of_work.after_commit(partial(self._cache_created, schema))
         return schema
 
     async def get_user_info_by_id(self, user_id: UIDType) -> UserInfoSchema | None:
-        user_cache = await self._cache.get(str(user_id))
-        if user_cache:
-            return user_cache
-        async with self._session() as session:
-            user: User | None = await UserPostgres(session).get_user_info_by_id(user_id)
-        if not user:
+        entry = await self._cache.get_entry(str(user_id))
+        if entry:
+            if entry.should_refresh(settings.redis.user_info_xfetch_beta):
+                self._refresh_user_info(user_id, entry.version)
+            return entry.value
+        schema = await _user_info_flight.do(
+            user_id, lambda: self._load_user_info(user_id)
+        )
+        return schema.model_copy(deep=True) if schema else None
+
+    def _refresh_user_info(self, user_id: UIDType, version: int) -> None:
+        """Reload user info into the cache in background before it expires."""
+        metrics.inc('cache.user_info.early_refresh')
+        task = asyncio.create_task(
+            _user_info_flight.do(
+                user_id, lambda: self._load_user_info_from_db(user_id, version)
+            )
+        )
+        _background_tasks.add(task)
+        task.add_done_callback(_background_tasks.discard)
+
+    async def _load_user_info(self, user_id: UIDType) -> UserInfoSchema | None:
+        """Load user info into the cache, once per user across workers if locking."""
+        if not settings.redis.user_info_lock_enabled:
+            return await self._load_user_info_from_db(user_id)
+        lock_name = CacheName.USER_INFO_LOCK.value.format(user_id)
+        lock = RedisLock()
+        token = await lock.acquire(lock_name, settings.redis.user_info_lock_ttl)
+        if token is None:
+            schema = await self._wait_user_info_cache(user_id)
+            if schema:
+                return schema
+        try:
+            return await self._load_user_info_from_db(user_id)
+        finally:
+            if token is not None:
+                await lock.release(lock_name, token)
+
+    async def _wait_user_info_cache(self, user_id: UIDType) -> UserInfoSchema | None:
+        """Wait for the lock owner to fill the cache."""
+        deadline = time.monotonic() + settings.redis.user_info_lock_wait / 1000
+        while time.monotonic() < deadline:
+            await asyncio.sleep(settings.redis.user_info_lock_poll / 1000)
+            schema = await self._cache.get(str(user_id))
+            if schema:
+                return schema
+        return None
+
+    async def _load_user_info_from_db(
+        self, user_id: UIDType, version: int | None = None
+    ) -> UserInfoSchema | None:
+        started = time.perf_counter()
+        async with self._read_session() as session:
+            schema = await UserPostgres(session).get_user_info_by_id(user_id)
+        if not schema and self._has_replicas:
+            async with self._session() as session:
+                schema = await UserPostgres(session).get_user_info_by_id(user_id)
+        if not schema:
             return None
-        schema = UserInfoSchema.model_validate(user, from_attributes=True)
-        await self._cache.set(str(user_id), schema)
+        delta = time.perf_counter() - started
+        await self._cache.set(str(user_id), schema, delta=delta, version=version)
         return schema
 
-    async def get_user_info_by_email(self, email: EmailStr) -> UserInfoSchemaActive | None:
-        async with self._session() as session:
-            db = UserPostgres(session)
-            user = await db.get_user_info_by_email(email)
-        if not user:
-            return None
-        user_schema = UserInfoSchemaActive.model_validate(user, from_attributes=True)
-        await self._cache.set(
-            str(user_schema.user_id),
-            UserInfoSchema.model_construct(**user_schema.model_dump()),
+    async def get_user_infos_by_ids(
+        self, user_ids: Sequence[UIDType]
+    ) -> dict[UIDType, UserInfoSchema]:
+        cached = await self._cache.get_many(str(user_id) for user_id in user_ids)
+        schemas = {UIDType(key): schema for key, schema in cached.items()}
+        missing = [user_id for user_id in user_ids if user_id not in schemas]
+        if not missing:
+            return schemas
+        started = time.perf_counter()
+        async with self._read_session() as session:
+            users = await UserPostgres(session).get_user_infos_by_ids(missing)
+        loaded = {user.user_id: user for user in users}
+        await self._cache.set_many(
+            {str(user_id): schema for user_id, schema in loaded.items()},
+            delta=time.perf_counter() - started,
         )
+        return schemas | loaded
+
+    async def get_user_info_by_email(self, email: EmailStr) -> UserInfoSchemaActive | None:
+        started = time.perf_counter()
+        async with self._transaction() as unit_of_work:
+            user_schema = await UserPostgres(
+                unit_of_work.session()
+            ).get_user_info_by_email(email)
+            if not user_schema:
+                return None
+            unit_of_work.after_commit(partial(
+                self._cache.set,
+                str(user_schema.user_id),
+                UserInfoSchema.model_construct(
+                    user_id=user_schema.user_id,
+                    email=user_schema.email,
+                    profile=user_schema.profile.model_copy(),
+                ),
+                delta=time.perf_counter() - started,
+            ))
         return user_schema
 
     async def update_profile(
@@ -81,38 +204,63 @@ class UserRepository(IUserRepository):
         user_id: UIDType,
         profile_schema: ProfileUpdateSchema
     ) -> ProfileSchema | None:
-        async with self._session() as session:
-            profile: Profile | None = await UserPostgres(session).update_profile(
+        async with self._transaction() as unit_of_work:
+            profile = await UserPostgres(unit_of_work.session()).update_profile(
                 user_id, profile_schema
             )
-        if not profile:
-            return None
-        schema = ProfileInfoSchema.model_validate(profile, from_attributes=True)
-        user_cache = await self._cache.get(str(user_id))
-        if user_cache:
-            user_cache.profile = schema
-            await self._cache.set(
-                str(user_id),
-                user_cache,
+            if not profile:
+                return None
+            changed = profile_schema.model_dump(
+                exclude_none=True, include={'first_name', 'last_name'}
+            )
+            unit_of_work.after_commit(
+                partial(self._update_cached_profile, user_id, changed)
             )
-        return ProfileSchema.model_validate(profile, from_attributes=True)
+        return profile
 
     async def activate_user(self, user_id: UIDType) -> None:
-        async with self._session() as session:
-            db = UserPostgres(session)
-            await db.activate_user(user_id)
+        async with self._transaction() as unit_of_work:
+            await UserPostgres(unit_of_work.session()).activate_user(user_id)
 
     async def change_password(self, user_id: UIDType, hashed_password: str) -> None:
-        async with self._session() as session:
-            db = UserPostgres(session)
-            await db.change_password(user_id, hashed_password)
-
-    async def update_user_avatar(self, user_id: UIDType, avatar_name: str) -> None:
-        async with self._session() as session:
-            db = UserPostgres(session)
-            await db.update_user_avatar(user_id, avatar_name)
-        schema = await self._cache.get(str(user_id))
-        if not schema:
-            return None
-        schema.profile.avatar = avatar_name
-        await self._cache.set(str(user_id), schema)
+        async with self._transaction() as unit_of_work:
+            await UserPostgres(unit_of_work.session()).change_password(
+                user_id, hashed_password
+            )
+
+    async def update_user_avatar(self, user_id: UIDType, avatar_name: str) -> str | None:
+        async with self._transaction() as unit_of_work:
+            previous = await UserPostgres(unit_of_work.session()).update_user_avatar(
+                user_id, avatar_name
+            )
+            unit_of_work.after_commit(
+                partial(self._update_cached_profile, user_id, {'avatar': avatar_name})
+            )
+        return previous
+
+    async def is_admin(self, user_id: UIDType) -> bool:
+        async with self._transaction() as unit_of_work:
+            return await UserPostgres(unit_of_work.session()).is_admin(user_id)
+
+    async def release_avatar(
+        self, avatar_name: str, delete: Callable[[], Awaitable[None]]
+    ) -> None:
+        unit_of_work = UnitOfWork.current()
+        if unit_of_work is None:
+            await self._release_avatar(avatar_name, delete)
+            return
+        unit_of_work.after_commit(partial(self._release_avatar, avatar_name, delete))
+
+    async def _release_avatar(
+        self, avatar_name: str, delete: Callable[[], Awaitable[None]]
+    ) -> None:
+        """Delete avatar under its lock, a new reference waits for the deletion."""
+        try:
+            async with self._transaction() as unit_of_work:
+                db = UserPostgres(unit_of_work.session())
+                await db.lock_avatar(avatar_name)
+                if not await db.is_avatar_referenced(avatar_name):
+                    await delete()
+        except Exception:
+            # An unreleased avatar only takes space, the request has succeeded.
+            logging.exception('Failed to release avatar %s', avatar_name)